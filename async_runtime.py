@@ -0,0 +1,446 @@
+"""
+Module with the asyncio runtime for the v3 interpreter: AsyncInterpreter runs a program as a coroutine
+whose inputi and inputs statements await an async input source, so thousands of interactive sessions
+(each its own AsyncInterpreter) can share one event loop. To keep one session from starving the others,
+a running program also yields to the event loop every yield_every loop iterations and method calls.
+
+Only statements that can suspend run as coroutines: calls, inputi and inputs, while loops, and the
+statements containing any of those. AsyncInterpreter.load() marks them when the program is loaded;
+every other statement runs through the same handlers as in the synchronous interpreter.
+
+serve_sessions() starts a server that runs a session of a program for every connection, with the
+connection as its input and output:
+
+    python async_runtime.py --program prog.brewin --socket /tmp/brewin.sock
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+
+from env_v3 import Frame
+from interpreterv3 import Interpreter, LoadedProgram
+from brewin_exception import BrewinException, report_uncaught
+from intbase import InterpreterBase
+from objectv3 import ObjectDef
+from output_sink import CallbackSink
+from type_valuev3 import Value
+
+YIELD_EVERY = 1000  # loop iterations and method calls between yields to the event loop
+
+# statements that can suspend whatever they contain
+SUSPENDING_STATEMENTS = frozenset(
+    [InterpreterBase.CALL_DEF, InterpreterBase.INPUT_INT_DEF, InterpreterBase.INPUT_STRING_DEF,
+     InterpreterBase.WHILE_DEF]
+)
+# names the operands of an operator are bound to when they had to be evaluated asynchronously; they
+# can't clash with variables, which can't contain spaces
+OPERAND_NAMES = (" operand1", " operand2")
+
+
+class AsyncInputSource:
+    """
+    Base class for the input sources of an AsyncInterpreter: like input_source.InputSource, but read_line()
+    and read_int() are coroutines.
+    """
+
+    async def read_line(self):
+        """Get the next line of input as a string, or None at the end of the input."""
+        return None
+
+    async def read_int(self):
+        """Get the next line of input as an int (fails like int(None) at the end of the input)."""
+        return int(await self.read_line())
+
+
+class StreamReaderSource(AsyncInputSource):
+    """
+    Reads lines from an asyncio.StreamReader, e.g. one end of a connection.
+    """
+
+    def __init__(self, reader, encoding="utf-8"):
+        self.reader = reader
+        self.encoding = encoding
+
+    async def read_line(self):
+        line = await self.reader.readline()
+        if not line:
+            return None
+        return line.decode(self.encoding).rstrip("\r\n")
+
+
+class QueueSource(AsyncInputSource):
+    """
+    Reads lines from an asyncio.Queue, where something else puts them; None marks the end of the input.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.at_end = False
+
+    async def read_line(self):
+        if self.at_end:
+            return None
+        line = await self.queue.get()
+        if line is None:
+            self.at_end = True
+            return None
+        return str(line)
+
+
+class AsyncInterpreter(Interpreter):
+    """
+    A v3 interpreter that runs programs as coroutines; see the module docstring.
+    """
+
+    def __init__(self, console_output=True, inp=None, output_sink=None, keep_output_log=True,
+                 yield_every=YIELD_EVERY, max_steps=None, time_limit=None):
+        """
+        inp can be an AsyncInputSource as well as anything the Interpreter takes (a list of strings or an
+        InputSource, which are read without awaiting); max_steps and time_limit are as for the Interpreter,
+        and time spent awaiting input counts towards the time limit.
+        """
+        async_input = inp if isinstance(inp, AsyncInputSource) else None
+        super().__init__(
+            console_output, None if async_input else inp, output_sink=output_sink, keep_output_log=keep_output_log,
+            max_steps=max_steps, time_limit=time_limit,
+        )
+        self.async_input = async_input
+        self.object_class = AsyncObjectDef
+        self.yield_every = yield_every
+        self.steps_until_yield = yield_every
+
+    def load(self, program):
+        """Load a program as Interpreter.load() does, also marking the statements that can suspend."""
+        loaded = super().load(program)
+        for class_def in loaded.class_index.values():
+            for method_def in class_def.get_methods():
+                AsyncObjectDef.bind_async_handlers(method_def.code)
+        loaded.async_ready = True
+        return loaded
+
+    def run(self, program):
+        """Run a program (source lines or a LoadedProgram) to the end on a new event loop."""
+        asyncio.run(self.run_async(program))
+
+    async def run_async(self, program):
+        """Run a program (source lines or a LoadedProgram loaded by an AsyncInterpreter)."""
+        if not isinstance(program, LoadedProgram):
+            program = self.load(program)
+        elif not program.async_ready or program.instrumented_by is not None:
+            raise ValueError("the program wasn't loaded by an AsyncInterpreter")
+        self.type_manager = program.type_manager
+        self.class_index = program.class_index
+        self.steps_until_yield = self.yield_every
+        self.reset_limits()
+
+        self.main_object = self.instantiate(InterpreterBase.MAIN_CLASS_DEF, None)
+        try:
+            await self.main_object.call_method_async(InterpreterBase.MAIN_FUNC_DEF, [], False, None)
+        except BrewinException as exception:
+            report_uncaught(self, exception)
+        finally:
+            self.flush_output()
+
+    def reset(self, inp=None):
+        """Clear what the last run left behind; inp, if given, replaces the input (and can be async)."""
+        if isinstance(inp, AsyncInputSource):
+            super().reset()
+            self.async_input = inp
+            return
+        super().reset(inp)
+        if inp is not None:
+            self.async_input = None
+
+    async def get_input_async(self):
+        if self.async_input is None:
+            return self.get_input()
+        self.flush_output()  # make sure any prompt has been sent
+        return await self.async_input.read_line()
+
+    async def get_input_int_async(self):
+        if self.async_input is None:
+            return self.get_input_int()
+        self.flush_output()
+        return await self.async_input.read_int()
+
+
+class AsyncObjectDef(ObjectDef):
+    """
+    An ObjectDef with coroutine versions of the statements that can suspend, and of the method calls and
+    expressions leading to them. Everything but the awaiting is done by ObjectDef's protected helpers, which
+    the synchronous statements use too.
+    """
+
+    async def call_method_async(self, method_name, actual_params, super_only, line_num_of_caller):
+        """Like call_method(), but a coroutine."""
+        interpreter = self.interpreter
+        interpreter.steps_until_check -= 1
+        if interpreter.steps_until_check <= 0:
+            interpreter.check_limits(line_num_of_caller)
+        interpreter.steps_until_yield -= 1
+        if interpreter.steps_until_yield <= 0:
+            interpreter.steps_until_yield = interpreter.yield_every
+            await asyncio.sleep(0)
+
+        obj_to_call_on, method_def = self._find_method(method_name, actual_params, super_only, line_num_of_caller)
+        frame_pool = interpreter.frame_pool
+        env = self._enter_method(method_def, actual_params)
+        try:
+            return_value = await obj_to_call_on.execute_statement_async(env, method_def.return_type, method_def.code)
+        finally:
+            frame_pool.release(env)
+        if return_value is not None:
+            return return_value
+        return self._default_return_value(method_def)
+
+    async def execute_statement_async(self, env, return_type, code):
+        """Execute a statement, awaiting it only if it can suspend."""
+        tok = code[0]
+        if not tok.suspends:
+            return tok.handler(self, env, return_type, code)
+        return await tok.async_handler(self, env, return_type, code)
+
+    async def __execute_begin_async(self, env, return_type, code, has_vardef=False):
+        if has_vardef:
+            code_start = 2
+            env.block_nest()
+            self._add_locals_to_env(env, code[1], code[0].line_num)
+        else:
+            code_start = 1
+        return_value = None
+        for statement in code[code_start:]:
+            return_value = await self.execute_statement_async(env, return_type, statement)
+            if return_value is not None:
+                break
+        if has_vardef:
+            env.block_unnest()
+        return return_value
+
+    async def __execute_let_async(self, env, return_type, code):
+        return await self.__execute_begin_async(env, return_type, code, True)
+
+    async def __execute_call_async(self, env, return_type, code):
+        await self.__execute_call_aux_async(env, code, code[0].line_num)
+
+    async def __execute_set_async(self, env, return_type, code):
+        val = await self.__evaluate_expression_async(env, code[2], code[0].line_num)
+        self._set_variable_aux(env, code[1], val, code[0].line_num)
+
+    async def __execute_return_async(self, env, return_type, code):
+        result = await self.__evaluate_expression_async(env, code[1], code[0].line_num)
+        return self._check_return_value(return_type, result, code[0].line_num)
+
+    async def __execute_print_async(self, env, return_type, code):
+        self._print_values([await self.__evaluate_expression_async(env, expr, code[0].line_num) for expr in code[1:]])
+
+    async def __execute_inputs_async(self, env, return_type, code):
+        val = Value(ObjectDef.STRING_TYPE_CONST, await self.interpreter.get_input_async())
+        self._set_variable_aux(env, code[1], val, code[0].line_num)
+
+    async def __execute_inputi_async(self, env, return_type, code):
+        val = Value(ObjectDef.INT_TYPE_CONST, await self.interpreter.get_input_int_async())
+        self._set_variable_aux(env, code[1], val, code[0].line_num)
+
+    async def __execute_if_async(self, env, return_type, code):
+        condition = await self.__evaluate_expression_async(env, code[1], code[0].line_num)
+        if condition.type() != ObjectDef.BOOL_TYPE_CONST:
+            self._non_boolean_condition(code)
+        if condition.value():
+            return await self.execute_statement_async(env, return_type, code[2])
+        if len(code) == 4:
+            return await self.execute_statement_async(env, return_type, code[3])
+        return None
+
+    async def __execute_while_async(self, env, return_type, code):
+        interpreter = self.interpreter
+        while True:
+            interpreter.steps_until_check -= 1
+            if interpreter.steps_until_check <= 0:
+                interpreter.check_limits(code[0].line_num)
+            interpreter.steps_until_yield -= 1
+            if interpreter.steps_until_yield <= 0:
+                interpreter.steps_until_yield = interpreter.yield_every
+                await asyncio.sleep(0)
+            condition = await self.__evaluate_expression_async(env, code[1], code[0].line_num)
+            if condition.type() != ObjectDef.BOOL_TYPE_CONST:
+                self._non_boolean_condition(code)
+            if not condition.value():
+                return None
+            return_value = await self.execute_statement_async(env, return_type, code[2])
+            if return_value is not None:
+                return return_value
+
+    async def __execute_try_async(self, env, return_type, code):
+        blocks = len(env.blocks)
+        try:
+            return await self.execute_statement_async(env, return_type, code[1])
+        except BrewinException as exception:
+            self._enter_catch(env, blocks, exception)
+        try:
+            return await self.execute_statement_async(env, return_type, code[2])
+        finally:
+            env.block_unnest()
+
+    async def __execute_throw_async(self, env, return_type, code):
+        self._throw(await self.__evaluate_expression_async(env, code[1], code[0].line_num), code[0].line_num)
+
+    async def __evaluate_expression_async(self, env, expr, line_num_of_statement):
+        if type(expr) is not list or not expr[0].suspends:
+            return self._evaluate_expression(env, expr, line_num_of_statement)
+        operator = expr[0]
+        if operator == InterpreterBase.CALL_DEF:
+            return await self.__execute_call_aux_async(env, expr, line_num_of_statement)
+        # an operator with a call among its operands: evaluate the operands here, then have the synchronous
+        # evaluator apply the operator to them, bound to variables of a scratch frame
+        names = OPERAND_NAMES[:len(expr) - 1]
+        operands = Frame(len(names))
+        for name, operand in zip(names, expr[1:]):
+            value = await self.__evaluate_expression_async(env, operand, line_num_of_statement)
+            operands.create_new_symbol(name, value.type(), value)
+        return self._evaluate_expression(operands, [operator, *names], line_num_of_statement)
+
+    async def __execute_call_aux_async(self, env, code, line_num_of_statement):
+        # the object a call is on is named by a variable (or me or super), so finding it can't suspend
+        obj, super_only = self._call_target(env, code[1], line_num_of_statement)
+        actual_args = []
+        for expr in code[3:]:
+            actual_args.append(await self.__evaluate_expression_async(env, expr, line_num_of_statement))
+        return await obj.call_method_async(code[2], actual_args, super_only, line_num_of_statement)
+
+    # maps each statement keyword that can suspend to the coroutine that executes it
+    ASYNC_STATEMENT_HANDLERS = {
+        InterpreterBase.BEGIN_DEF: __execute_begin_async,
+        InterpreterBase.LET_DEF: __execute_let_async,
+        InterpreterBase.CALL_DEF: __execute_call_async,
+        InterpreterBase.SET_DEF: __execute_set_async,
+        InterpreterBase.RETURN_DEF: __execute_return_async,
+        InterpreterBase.PRINT_DEF: __execute_print_async,
+        InterpreterBase.INPUT_STRING_DEF: __execute_inputs_async,
+        InterpreterBase.INPUT_INT_DEF: __execute_inputi_async,
+        InterpreterBase.IF_DEF: __execute_if_async,
+        InterpreterBase.WHILE_DEF: __execute_while_async,
+        InterpreterBase.TRY_DEF: __execute_try_async,
+        InterpreterBase.THROW_DEF: __execute_throw_async,
+    }
+
+    @staticmethod
+    def bind_async_handlers(code):
+        """
+        Run once per method when the program is loaded (after ObjectDef.bind_statement_handlers()): marks the
+        keyword token of every statement, and the operator token of every expression, with whether it can
+        suspend, and tags the statements with their coroutine. Returns whether the statement can suspend.
+        """
+        if not isinstance(code, list) or not code:
+            return False
+        tok = code[0]
+        sub_statements, expressions = [], []
+        if tok == InterpreterBase.BEGIN_DEF:
+            sub_statements = code[1:]
+        elif tok == InterpreterBase.LET_DEF:
+            sub_statements = code[2:]
+        elif tok == InterpreterBase.IF_DEF or tok == InterpreterBase.WHILE_DEF:
+            expressions, sub_statements = code[1:2], code[2:4]
+        elif tok == InterpreterBase.TRY_DEF:
+            sub_statements = code[1:3]
+        elif tok == InterpreterBase.THROW_DEF:
+            expressions = code[1:2]
+        elif tok == InterpreterBase.SET_DEF:
+            expressions = code[2:3]
+        elif tok == InterpreterBase.RETURN_DEF or tok == InterpreterBase.PRINT_DEF:
+            expressions = code[1:]
+        elif tok == InterpreterBase.CALL_DEF:
+            expressions = code[3:]
+        suspends = tok in SUSPENDING_STATEMENTS
+        for statement in sub_statements:
+            suspends = AsyncObjectDef.bind_async_handlers(statement) or suspends
+        for expr in expressions:
+            suspends = AsyncObjectDef.__mark_expression(expr) or suspends
+        # statements that aren't in the table (unknown ones) never suspend; their handler reports the error
+        tok.suspends = suspends and tok in AsyncObjectDef.ASYNC_STATEMENT_HANDLERS
+        tok.async_handler = AsyncObjectDef.ASYNC_STATEMENT_HANDLERS.get(tok)
+        return tok.suspends
+
+    @staticmethod
+    def __mark_expression(expr):
+        if type(expr) is not list or not expr:
+            return False
+        suspends = expr[0] == InterpreterBase.CALL_DEF
+        for operand in expr[1:]:
+            suspends = AsyncObjectDef.__mark_expression(operand) or suspends
+        expr[0].suspends = suspends
+        return suspends
+
+
+async def run_session(loaded, reader, writer, yield_every=YIELD_EVERY):
+    """
+    Run one session of a LoadedProgram (loaded by an AsyncInterpreter), reading its input from reader
+    and writing its output to writer (asyncio streams); if the program fails, the error is written last.
+    """
+    interpreter = AsyncInterpreter(
+        console_output=False,
+        inp=StreamReaderSource(reader),
+        output_sink=CallbackSink(lambda line: writer.write(f"{line}\n".encode())),
+        keep_output_log=False,
+        yield_every=yield_every,
+    )
+    try:
+        await interpreter.run_async(loaded)
+    except Exception as error:  # pylint: disable=broad-except
+        writer.write(f"error: {error}\n".encode())
+    try:
+        await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+    except ConnectionError:
+        pass  # the client went away first
+
+
+async def serve_sessions(program, path=None, host=None, port=None, yield_every=YIELD_EVERY):
+    """
+    Load program (source lines) and start an asyncio server that runs a session of it for every
+    connection, on the Unix socket at path or on host and port; returns the asyncio Server.
+    """
+    loaded = AsyncInterpreter(console_output=False).load(program)
+
+    async def handle(reader, writer):
+        await run_session(loaded, reader, writer, yield_every)
+
+    if path is not None:
+        return await asyncio.start_unix_server(handle, path, backlog=socket.SOMAXCONN)
+    return await asyncio.start_server(handle, host, port, backlog=socket.SOMAXCONN)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve interactive sessions of a Brewin program.")
+    parser.add_argument("--program", required=True, help="source file to run for every connection")
+    parser.add_argument("--socket", help="path of the Unix socket to listen on")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="TCP port to listen on, instead of a Unix socket")
+    parser.add_argument("--yield-every", type=int, default=YIELD_EVERY)
+    args = parser.parse_args(argv)
+    if args.socket is None and args.port is None:
+        parser.error("give --socket or --port")
+
+    with open(args.program) as f:
+        program = f.readlines()
+
+    async def serve():
+        server = await serve_sessions(program, args.socket, args.host, args.port, args.yield_every)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.socket is not None and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
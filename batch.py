@@ -0,0 +1,376 @@
+"""
+Module with the batch runner: runs many (program, input) jobs through the interpreter on a pool of
+worker processes, and hands back each job's output and error in the order the jobs were given.
+
+The workers are started once and stay alive across jobs (and across batches run by the same
+BatchRunner), so each imports the interpreter only once, and keeps the programs it's been sent: a
+program shared by many jobs goes to each worker the first time that worker needs it, and later jobs
+only name it. With the v3 interpreter, workers keep each program loaded (see
+interpreterv3.LoadedProgram), so it's parsed once per worker rather than once per job. A job that
+runs past the timeout is stopped inside its worker, which moves on to the next job; a worker that
+dies (e.g. a program overflowed the C stack) or doesn't stop a job within a grace period after the
+timeout is replaced, and the job is reported as failed.
+
+As a script, it reads jobs from a file of JSON lines and writes each result as a line of JSON:
+
+    python batch.py --program prog.brewin --jobs inputs.jsonl --workers 4 --timeout 2
+
+Each line of the jobs file is either a JSON list (the job's input) or an object with the job's
+"input" and, to run something other than --program, its "program" (the path of a source file).
+"""
+
+import argparse
+import collections
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import signal
+import sys
+import time
+
+from input_source import IterSource
+
+ENGINES = {
+    "v2": "interpreterv2",
+    "v3": "interpreterv3",
+}
+
+TIMEOUT_GRACE = 1.0  # seconds past its timeout a job gets to stop before its worker is killed
+MAX_AHEAD_PER_WORKER = 16  # jobs handed out past the oldest unfinished one, per worker
+
+# error_type and error_line are what get_error_type_and_line() returned (both None if the program ran
+# to the end); error is the message of the exception the run failed with, if it did
+BatchResult = collections.namedtuple(
+    "BatchResult",
+    ["index", "output", "error_type", "error_line", "error", "timed_out", "elapsed"],
+)
+
+
+class JobTimeout(BaseException):
+    """
+    Raised in a worker when its job runs past the timeout. It isn't an Exception, so nothing in the
+    interpreter catches it.
+    """
+
+
+class BatchRunner:
+    """
+    Runs jobs on a pool of worker processes, started on the first run() and stopped by close().
+    """
+
+    def __init__(self, workers=None, timeout=None, engine="v3", interpreter_options=None):
+        """
+        workers is the number of worker processes (by default, one per CPU); timeout, if given, is the
+        limit in seconds on each job's run; engine is "v2" or "v3"; interpreter_options are passed on
+        to each Interpreter, e.g. {"cyclic_gc": False}. Raises ValueError for an unknown engine, or
+        options its Interpreter doesn't take.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"unknown engine {engine}")
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.engine = engine
+        self.interpreter_options = interpreter_options or {}
+        # options the engine's Interpreter doesn't take would fail every job, so reject them here
+        try:
+            __import__(ENGINES[engine]).Interpreter(console_output=False, **self.interpreter_options)
+        except TypeError as exc:
+            raise ValueError(f"bad interpreter_options for the {engine} engine: {exc}") from exc
+        self.context = multiprocessing.get_context()
+        self.pool = []
+        self.program_ids = {}  # program source (a tuple of lines) -> id the workers know it by
+
+    def run(self, jobs):
+        """
+        Run jobs, an iterable of (program, inp) pairs where program is a list of source lines and
+        inp a list of input strings (or None), and yield a BatchResult per job, in the jobs' order.
+        Jobs are read from the iterable only as workers become free, so it can be a generator.
+        """
+        while len(self.pool) < self.workers:
+            self.pool.append(self.__start_worker())
+        jobs = iter(jobs)
+        max_ahead = MAX_AHEAD_PER_WORKER * self.workers
+        finished = {}  # index -> BatchResult of a job that finished before an earlier one
+        next_index = 0  # the oldest job whose result hasn't been yielded
+        dispatched = 0
+        exhausted = False
+        try:
+            while True:
+                for worker in self.pool:
+                    if exhausted or dispatched - next_index >= max_ahead:
+                        break
+                    if worker.job is not None:
+                        continue
+                    job = next(jobs, None)
+                    if job is None:
+                        exhausted = True
+                        break
+                    self.__send(worker, dispatched, *job)
+                    dispatched += 1
+                busy = [worker for worker in self.pool if worker.job is not None]
+                if not busy:
+                    return
+                for result in self.__collect(busy):
+                    finished[result.index] = result
+                while next_index in finished:
+                    yield finished.pop(next_index)
+                    next_index += 1
+        finally:
+            # the caller stopped early: jobs still running would answer the next run()
+            for i, worker in enumerate(self.pool):
+                if worker.job is not None:
+                    worker.stop(kill=True)
+                    self.pool[i] = self.__start_worker()
+
+    def close(self):
+        """Stop the worker processes."""
+        for worker in self.pool:
+            worker.stop()
+        self.pool = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __start_worker(self):
+        return _Worker(self.context, self.engine, self.interpreter_options)
+
+    def __send(self, worker, index, program, inp):
+        source = tuple(program)
+        program_id = self.program_ids.get(source)
+        if program_id is None:
+            program_id = self.program_ids[source] = len(self.program_ids)
+        # a worker is only sent the program's source the first time it runs it
+        sent_source = None
+        if program_id not in worker.program_ids:
+            worker.program_ids.add(program_id)
+            sent_source = list(program)
+        deadline = None
+        if self.timeout is not None:
+            deadline = time.monotonic() + self.timeout + TIMEOUT_GRACE
+        worker.conn.send((index, program_id, sent_source, inp, self.timeout))
+        worker.job = (index, deadline)
+
+    def __collect(self, busy):
+        """Wait for at least one of the busy workers to finish its job, and get the results."""
+        deadlines = [worker.job[1] for worker in busy if worker.job[1] is not None]
+        wait_time = None
+        if deadlines:
+            wait_time = max(0.0, min(deadlines) - time.monotonic())
+        waitables = {}
+        for worker in busy:
+            waitables[worker.conn] = worker
+            waitables[worker.process.sentinel] = worker
+        ready = multiprocessing.connection.wait(list(waitables), wait_time)
+        results = []
+        handled = set()
+        for waitable in ready:
+            worker = waitables[waitable]
+            if worker in handled:
+                continue
+            handled.add(worker)
+            try:
+                result = worker.conn.recv()
+            except (EOFError, OSError):
+                worker.process.join()
+                result = self.__fail(worker, f"worker exited with status {worker.process.exitcode}", False)
+            else:
+                worker.job = None
+            results.append(result)
+        now = time.monotonic()
+        for worker in busy:
+            if worker not in handled and worker.job[1] is not None and now >= worker.job[1]:
+                results.append(self.__fail(worker, f"timed out after {self.timeout}s", True))
+        return results
+
+    def __fail(self, worker, error, timed_out):
+        """Replace a worker that died or got stuck, and make up the result of its job."""
+        index, _ = worker.job
+        worker.stop(kill=True)
+        self.pool[self.pool.index(worker)] = self.__start_worker()
+        return BatchResult(index, [], None, None, error, timed_out, None)
+
+
+class _Worker:
+    """
+    The parent's handle on one worker process.
+    """
+
+    def __init__(self, context, engine, interpreter_options):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, engine, interpreter_options), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.program_ids = set()  # ids of the programs this worker has been sent
+        self.job = None  # (index, deadline) of the job it's running
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join(TIMEOUT_GRACE)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _worker_main(conn, engine, interpreter_options):
+    module = __import__(ENGINES[engine])
+    programs = {}  # program id -> source lines, or the program loaded once it's been run
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # interrupting the batch is up to the parent
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        index, program_id, program, inp, timeout = message
+        if program is not None:
+            programs[program_id] = program
+        conn.send(run_job(module, index, programs, program_id, inp, timeout, interpreter_options))
+
+
+def job_input(inp):
+    """
+    Get the input to give the interpreter of a job with input inp: without any, a program that reads
+    some gets None instead of waiting on the process's stdin.
+    """
+    return inp or IterSource(())
+
+
+def run_and_report(index, get_interpreter, run, timeout_exceptions=()):
+    """
+    Run a job and get its BatchResult: get_interpreter() gets the Interpreter to run it on, and
+    run(interpreter) runs it; an exception in timeout_exceptions means the run timed out. Errors,
+    including one getting the interpreter, are reported in the result rather than raised.
+    """
+    interpreter = None
+    error = None
+    timed_out = False
+    start = time.perf_counter()
+    try:
+        interpreter = get_interpreter()
+        run(interpreter)
+    except timeout_exceptions as exc:
+        timed_out = True
+        error = str(exc)
+    except Exception as exc:  # pylint: disable=broad-except
+        error = str(exc) or type(exc).__name__
+    elapsed = time.perf_counter() - start
+    if interpreter is None:  # it couldn't be created
+        return BatchResult(index, [], None, None, error, timed_out, elapsed)
+    error_type, error_line = interpreter.get_error_type_and_line()
+    output = [str(line) for line in interpreter.get_output()]
+    return BatchResult(index, output, error_type, error_line, error, timed_out, elapsed)
+
+
+def run_job(module, index, programs, program_id, inp, timeout=None, interpreter_options=None):
+    """
+    Run one job in this process and get its BatchResult. module is the interpreter module
+    (interpreterv2 or interpreterv3); programs maps program ids to source lines, and the program the job
+    runs, programs[program_id], is replaced by its LoadedProgram if the engine has one; timeout is
+    enforced with SIGALRM, so it only works on the main thread.
+    """
+
+    def get_interpreter():
+        return module.Interpreter(console_output=False, inp=job_input(inp), **(interpreter_options or {}))
+
+    def raise_timeout(signum, frame):
+        raise JobTimeout(f"timed out after {timeout}s")
+
+    def run(interpreter):
+        if timeout is not None:
+            signal.signal(signal.SIGALRM, raise_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            program = programs[program_id]
+            if isinstance(program, list) and hasattr(interpreter, "load"):
+                program = interpreter.load(program)
+                if program.instrumented_by is None:  # otherwise only this job's interpreter can run it
+                    programs[program_id] = program
+            interpreter.run(program)
+        finally:
+            if timeout is not None:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+
+    return run_and_report(index, get_interpreter, run, (JobTimeout,))
+
+
+def run_batch(jobs, workers=None, timeout=None, engine="v3", **interpreter_options):
+    """
+    Run jobs, an iterable of (program, inp) pairs, on a new pool of workers and yield a BatchResult
+    per job, in order; see BatchRunner.
+    """
+    with BatchRunner(workers, timeout, engine, interpreter_options) as runner:
+        yield from runner.run(jobs)
+
+
+def result_to_dict(result):
+    """Get a BatchResult as a dict of plain values, e.g. for JSON."""
+    fields = result._asdict()
+    if result.error_type is not None:
+        fields["error_type"] = result.error_type.name
+    return fields
+
+
+def read_jobs(lines, default_program=None):
+    """Get the (program, inp) pairs of a jobs file's JSON lines; see the module docstring."""
+    programs = {}  # path -> source lines
+    for line in lines:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        if isinstance(job, list):
+            job = {"input": job}
+        path = job.get("program", default_program)
+        if path is None:
+            raise ValueError(f"job without a program: {line.strip()}")
+        if path not in programs:
+            with open(path) as f:
+                programs[path] = f.readlines()
+        yield programs[path], job.get("input")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many Brewin jobs on a pool of worker processes.")
+    parser.add_argument("--program", help="source file run by the jobs that don't name one")
+    parser.add_argument("--jobs", default="-", help="file of jobs as JSON lines (default: stdin)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--timeout", type=float, help="limit in seconds on each job's run")
+    parser.add_argument("--max-steps", type=int,
+                        help="limit on the loop iterations and method calls of each job's run (v3 only)")
+    parser.add_argument("--engine", default="v3", choices=sorted(ENGINES))
+    parser.add_argument("--output", help="write the results to this file instead of stdout")
+    args = parser.parse_args(argv)
+    if args.max_steps is not None and args.engine != "v3":
+        parser.error("--max-steps needs the v3 engine")
+
+    jobs_file = sys.stdin if args.jobs == "-" else open(args.jobs)
+    out = sys.stdout if args.output is None else open(args.output, "w")
+    try:
+        jobs = read_jobs(jobs_file, args.program)
+        options = {} if args.max_steps is None else {"max_steps": args.max_steps}
+        for result in run_batch(jobs, args.workers, args.timeout, args.engine, **options):
+            out.write(json.dumps(result_to_dict(result)) + "\n")
+            out.flush()
+    finally:
+        if jobs_file is not sys.stdin:
+            jobs_file.close()
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
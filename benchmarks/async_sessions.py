@@ -0,0 +1,93 @@
+"""
+Measures how many interactive sessions per second the asyncio runtime (async_runtime.py) serves: a
+session server for a small interactive program listens on a Unix socket, and clients in the same event
+loop connect, answer the program's prompts one line at a time, and read its output to the end.
+
+    python benchmarks/async_sessions.py                          # 2000 sessions, 1/100/1000 at a time
+    python benchmarks/async_sessions.py --sessions 5000 --concurrency 10,5000
+
+Every session must get the expected output. Clients and server share the process, so the rate is a
+lower bound on what the server alone could do.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# pylint: disable=wrong-import-position
+from async_runtime import serve_sessions
+
+# asks for a name and three numbers, then reports their total
+PROGRAM = [
+    "(class main",
+    " (method int ask ()",
+    "  (let ((int n 0)) (begin (print \"number?\") (inputi n) (return n))))",
+    " (method void main ()",
+    "  (let ((string name \"\") (int i 0) (int total 0))",
+    "   (begin",
+    "    (print \"name?\")",
+    "    (inputs name)",
+    "    (while (< i 3) (begin (set total (+ total (call me ask))) (set i (+ i 1))))",
+    "    (print name \" \" total)))))",
+]
+
+
+async def client(path, session):
+    reader, writer = await asyncio.open_unix_connection(path)
+    answers = [f"user{session}", "1", "2", str(session)]
+    lines = []
+    for answer in answers:
+        lines.append(await reader.readline())  # the prompt
+        writer.write(f"{answer}\n".encode())
+        await writer.drain()
+    lines.append(await reader.readline())
+    writer.close()
+    await writer.wait_closed()
+    if lines[-1].decode().strip() != f"user{session} {3 + session}":
+        raise RuntimeError(f"session {session} got {lines}")
+
+
+async def measure(sessions, concurrency):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "brewin.sock")
+        server = await serve_sessions(PROGRAM, path)
+        async with server:
+            limit = asyncio.Semaphore(concurrency)
+
+            async def limited(session):
+                async with limit:
+                    await client(path, session)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(limited(session) for session in range(sessions)))
+            return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure sessions per second of the asyncio runtime.")
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--concurrency", default="1,100,1000", help="comma-separated sessions at a time")
+    parser.add_argument("--output", help="write the rates to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for concurrency in (int(level) for level in args.concurrency.split(",")):
+        elapsed = asyncio.run(measure(args.sessions, concurrency))
+        results.append({"concurrency": concurrency, "seconds": elapsed, "sessions_per_second": args.sessions / elapsed})
+        print(f"{concurrency:>6} at a time: {args.sessions / elapsed:.0f} sessions/s")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"sessions": args.sessions, "results": results}, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
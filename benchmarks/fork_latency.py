@@ -0,0 +1,106 @@
+"""
+Measures the latency of one short run of a Brewin program, from the caller's side, two ways:
+
+- fresh: a new `python` process imports the interpreter, loads the program and runs it
+- forkserver: a request to a fork server (forkserver.py) that loaded the program beforehand
+
+    python benchmarks/fork_latency.py                   # 100 runs of testpoly.brewin each way
+    python benchmarks/fork_latency.py --program test.brewin --runs 300
+
+Reports the min, median and 95th percentile latency of each way.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, REPO_DIR)
+
+# pylint: disable=wrong-import-position
+from forkserver import request
+
+FRESH_RUN = """
+import sys
+sys.path.insert(0, {repo!r})
+from interpreterv3 import Interpreter
+interpreter = Interpreter(console_output=False)
+try:
+    interpreter.run(open({path!r}).readlines())
+except RuntimeError:
+    pass
+print(interpreter.get_output()[-1:])
+"""
+
+
+def time_fresh(path, runs):
+    code = FRESH_RUN.format(repo=REPO_DIR, path=os.path.abspath(path))
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def time_forkserver(path, runs):
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "brewin.sock")
+        server = subprocess.Popen([
+            sys.executable, os.path.join(REPO_DIR, "forkserver.py"), "serve",
+            "--socket", socket_path, "--program", f"bench={path}",
+        ])
+        try:
+            while not os.path.exists(socket_path):
+                if server.poll() is not None:
+                    raise RuntimeError("the fork server didn't start")
+                time.sleep(0.01)
+            latencies = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                request(socket_path, "bench")
+                latencies.append(time.perf_counter() - start)
+        finally:
+            server.terminate()
+            server.wait()
+    return latencies
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare fork-server and fresh-process run latency.")
+    parser.add_argument("--program", default=os.path.join(REPO_DIR, "testpoly.brewin"))
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--output", help="write the latencies to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, measure in (("fresh", time_fresh), ("forkserver", time_forkserver)):
+        results[name] = summarize(measure(args.program, args.runs))
+        print(
+            f"{name:>10}: min {results[name]['min'] * 1e3:.2f}ms, median {results[name]['median'] * 1e3:.2f}ms, "
+            f"p95 {results[name]['p95'] * 1e3:.2f}ms"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"program": args.program, "runs": args.runs, "results": results}, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
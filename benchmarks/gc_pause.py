@@ -0,0 +1,102 @@
+"""
+Measures the pauses python's cyclic garbage collector adds to an allocation-heavy v3 program: a loop
+that creates --count objects of a class three levels deep (each object three ObjectDef parts), each
+replacing the previous one, timed with and without cyclic_gc.
+
+    python benchmarks/gc_pause.py                         # 20000 objects, cyclic_gc on and off
+    python benchmarks/gc_pause.py --count 100000 --output gc.json
+
+Collections are timed with gc.callbacks, so a pause is the time between a collection's start and
+stop. Objects aren't reference cycles, so refcounting frees each one as soon as it's replaced and
+the collections that do run have little to do; with cyclic_gc=False they don't run at all.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# pylint: disable=wrong-import-position
+import interpreterv3
+
+
+def generate_program(count):
+    lines = [
+        "(class node0 (field int a 0) (field string s \"\") (method int value () (return a)))",
+        "(class node1 inherits node0 (field int b 1) (field bool f false))",
+        "(class node2 inherits node1 (field int c 2) (field node2 next null))",
+        "(class main",
+        " (field node2 obj null)",
+        " (method void main ()",
+        "  (let ((int i 0))",
+        "   (begin",
+        f"    (while (< i {count}) (begin (set obj (new node2)) (set i (+ i 1))))",
+        "    (print (call obj value))))))",
+    ]
+    return [line + "\n" for line in lines]
+
+
+class PauseTimer:
+    """Records the length of every cyclic collection while installed in gc.callbacks."""
+
+    def __init__(self):
+        self.pauses = []
+        self.started = None
+
+    def __call__(self, phase, info):
+        if phase == "start":
+            self.started = time.perf_counter()
+        elif self.started is not None:
+            self.pauses.append(time.perf_counter() - self.started)
+            self.started = None
+
+
+def time_run(program, cyclic_gc):
+    interpreter = interpreterv3.Interpreter(console_output=False, cyclic_gc=cyclic_gc)
+    timer = PauseTimer()
+    gc.collect()  # so garbage from before the run isn't collected during it
+    gc.callbacks.append(timer)
+    try:
+        start = time.perf_counter()
+        interpreter.run(program)
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.callbacks.remove(timer)
+    return {
+        "seconds": elapsed,
+        "collections": len(timer.pauses),
+        "total_pause_ms": sum(timer.pauses) * 1e3,
+        "max_pause_ms": max(timer.pauses, default=0.0) * 1e3,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time cyclic GC pauses in an allocation loop.")
+    parser.add_argument("--count", type=int, default=20000, help="objects created per run")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per setting; the fastest counts")
+    parser.add_argument("--output", help="write the timings to this JSON file")
+    args = parser.parse_args(argv)
+
+    program = generate_program(args.count)
+    results = {}
+    for cyclic_gc in (True, False):
+        runs = [time_run(program, cyclic_gc) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run["seconds"])
+        name = f"cyclic_gc={cyclic_gc}"
+        results[name] = best
+        print(f"{name:>16}: {best['seconds']:.3f}s, {best['collections']} collections, "
+              f"{best['total_pause_ms']:.1f}ms total pause, {best['max_pause_ms']:.2f}ms max")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"count": args.count, "results": results}, f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
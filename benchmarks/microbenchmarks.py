@@ -0,0 +1,242 @@
+"""
+Microbenchmarks for the interpreter's subsystems in isolation, each measured over a range of sizes
+to get a scaling curve:
+
+- parse: BParser.parse time by program size (lines)
+- subtype: TypeManager.is_a_subtype by hierarchy depth
+- type_compat: TypeManager.check_type_compatibility by hierarchy depth
+- new_by_fields: object construction (Interpreter.instantiate) by number of fields
+- new_by_depth: object construction by inheritance depth
+- call_lookup: call_method of a method defined only in the base class, by override depth
+- env_v2_get: env_v2.EnvironmentManager.get of an outermost variable, by block nesting depth
+- env_v3_get: env_v3.Frame.get of the same, by block nesting depth
+
+For every curve the runner fits the slope of log(time) against log(size) and flags the curve if it
+grows faster than expected (e.g. a slope near 2 where linear growth is expected), so super-linear
+behavior introduced by a change stands out.
+
+    python benchmarks/microbenchmarks.py                    # all benchmarks, ASCII curves
+    python benchmarks/microbenchmarks.py --only parse,subtype --output micro.json
+    python benchmarks/microbenchmarks.py --plot-dir plots   # PNG curves, if matplotlib is installed
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import timeit
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# pylint: disable=wrong-import-position
+from bparser import BParser
+from env_v2 import EnvironmentManager
+from env_v3 import Frame
+from interpreterv3 import Interpreter
+from type_valuev3 import Type, TypeManager
+
+# allowed slope above the expected one before a curve is flagged
+SLOPE_TOLERANCE = 0.35
+
+
+def measure(func, repeat=3, min_time=0.05):
+    """Get the best time per call of func, in seconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat, number)) / number
+
+
+def hierarchy_source(depth, fields_per_class=1, extra_methods=""):
+    """Source lines for classes c0 (the base) to c{depth-1}, each inheriting from the previous one."""
+    lines = []
+    for level in range(depth):
+        fields = " ".join(f"(field int f{level}_{i} {i})" for i in range(fields_per_class))
+        inherits = f" inherits c{level - 1}" if level else ""
+        methods = extra_methods if level == 0 else ""
+        lines.append(
+            f"(class c{level}{inherits} {fields} (method int m{level} () (return {level})){methods})"
+        )
+    return lines
+
+
+def loaded_interpreter(class_lines):
+    """An interpreter that has run a program with the given classes and an empty main."""
+    program = class_lines + ["(class main (method void main () (print 0)))"]
+    interpreter = Interpreter(console_output=False)
+    interpreter.run(program)
+    return interpreter
+
+
+def bench_parse(size):
+    # size lines of a class with one small method per line
+    lines = ["(class main"]
+    for i in range(size - 2):
+        lines.append(f" (method int m{i} ((int x) (string s)) (return (+ x {i})))")
+    lines.append(" (method void main () (print \"x\")))")
+    return measure(lambda: BParser.parse(lines))
+
+
+def bench_subtype(depth):
+    manager = TypeManager()
+    for level in range(depth + 1):
+        manager.add_class_type(f"c{level}", f"c{level - 1}" if level else None)
+    base, derived = "c0", f"c{depth}"
+    return measure(lambda: manager.is_a_subtype(base, derived))
+
+
+def bench_type_compat(depth):
+    manager = TypeManager()
+    for level in range(depth + 1):
+        manager.add_class_type(f"c{level}", f"c{level - 1}" if level else None)
+    base, derived = Type("c0"), Type(f"c{depth}", f"c{depth - 1}")
+    return measure(lambda: manager.check_type_compatibility(base, derived, True))
+
+
+def bench_new_by_fields(fields):
+    interpreter = loaded_interpreter(hierarchy_source(1, fields))
+    return measure(lambda: interpreter.instantiate("c0", None))
+
+
+def bench_new_by_depth(depth):
+    interpreter = loaded_interpreter(hierarchy_source(depth))
+    derived = f"c{depth - 1}"
+    return measure(lambda: interpreter.instantiate(derived, None))
+
+
+def bench_call_lookup(depth):
+    interpreter = loaded_interpreter(hierarchy_source(depth, extra_methods=" (method int base () (return 1))"))
+    obj = interpreter.instantiate(f"c{depth - 1}", None)
+    return measure(lambda: obj.call_method("base", [], False, None))
+
+
+def bench_env_v2_get(depth):
+    env = EnvironmentManager()
+    env.create_new_symbol("outer", 1)
+    for level in range(depth):
+        env.block_nest()
+        env.create_new_symbol(f"v{level}", level)
+    return measure(lambda: env.get("outer"))
+
+
+def bench_env_v3_get(depth):
+    frame = Frame(depth + 1)
+    frame.create_new_symbol("outer", None, 1)
+    for level in range(depth):
+        frame.block_nest()
+        frame.create_new_symbol(f"v{level}", None, level)
+    return measure(lambda: frame.get("outer"))
+
+
+# name -> (function of the size, sizes, what the size is, expected slope of time against size)
+BENCHMARKS = {
+    "parse": (bench_parse, [125, 250, 500, 1000, 2000, 4000], "lines", 1.0),
+    "subtype": (bench_subtype, [1, 2, 4, 8, 16, 32, 64], "hierarchy depth", 1.0),
+    "type_compat": (bench_type_compat, [1, 2, 4, 8, 16, 32, 64], "hierarchy depth", 1.0),
+    "new_by_fields": (bench_new_by_fields, [1, 2, 4, 8, 16, 32, 64], "fields", 1.0),
+    "new_by_depth": (bench_new_by_depth, [1, 2, 4, 8, 16, 32], "inheritance depth", 1.0),
+    "call_lookup": (bench_call_lookup, [1, 2, 4, 8, 16, 32], "override depth", 1.0),
+    "env_v2_get": (bench_env_v2_get, [1, 2, 4, 8, 16, 32, 64], "nesting depth", 1.0),
+    "env_v3_get": (bench_env_v3_get, [1, 2, 4, 8, 16, 32, 64], "nesting depth", 0.0),
+}
+
+
+def fit_slope(sizes, times):
+    """
+    Least-squares slope of log(time) against log(size), ignoring times that aren't positive; None
+    if fewer than two sizes are left.
+    """
+    points = [(math.log(size), math.log(t)) for size, t in zip(sizes, times) if t > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    if not variance:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+def run_benchmark(name):
+    func, sizes, size_label, expected_slope = BENCHMARKS[name]
+    times = [func(size) for size in sizes]
+    # the slope over the larger half of the sizes, where constant overheads matter least
+    tail = len(sizes) // 2
+    slope = fit_slope(sizes[tail:], times[tail:]) or 0.0
+    return {
+        "name": name,
+        "size_label": size_label,
+        "sizes": sizes,
+        "seconds_per_op": times,
+        "slope": slope,
+        "expected_slope": expected_slope,
+        "super_linear": slope > expected_slope + SLOPE_TOLERANCE,
+    }
+
+
+def ascii_curve(result, width=50):
+    """The curve as text: one bar per size, scaled to the slowest size."""
+    longest = max(result["seconds_per_op"])
+    lines = [
+        f"{result['name']} (time per op by {result['size_label']}; slope {result['slope']:.2f},"
+        f" expected {result['expected_slope']:.1f}{', SUPER-LINEAR' if result['super_linear'] else ''})"
+    ]
+    for size, t in zip(result["sizes"], result["seconds_per_op"]):
+        bar = "#" * max(1, round(width * t / longest))
+        lines.append(f"{size:>8} {t * 1e6:>12.3f}us {bar}")
+    return "\n".join(lines)
+
+
+def plot_curves(results, plot_dir):
+    """Save a log-log PNG of each curve in plot_dir; returns False if matplotlib isn't installed."""
+    try:
+        import matplotlib  # pylint: disable=import-outside-toplevel
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return False
+    os.makedirs(plot_dir, exist_ok=True)
+    for result in results:
+        fig, ax = plt.subplots()
+        ax.loglog(result["sizes"], [t * 1e6 for t in result["seconds_per_op"]], marker="o")
+        ax.set_xlabel(result["size_label"])
+        ax.set_ylabel("microseconds per op")
+        ax.set_title(f"{result['name']} (slope {result['slope']:.2f})")
+        fig.savefig(os.path.join(plot_dir, f"{result['name']}.png"))
+        plt.close(fig)
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Brewin component microbenchmarks.")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="comma-separated benchmarks to run")
+    parser.add_argument("--output", help="write the curves to this JSON file")
+    parser.add_argument("--plot-dir", help="save PNG plots of the curves here (needs matplotlib)")
+    args = parser.parse_args(argv)
+
+    sys.setrecursionlimit(100000)
+    results = []
+    for name in args.only.split(","):
+        result = run_benchmark(name)
+        results.append(result)
+        print(ascii_curve(result) + "\n")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"results": results}, f, indent=2)
+            f.write("\n")
+    if args.plot_dir and not plot_curves(results, args.plot_dir):
+        print("matplotlib isn't installed; no plots were saved", file=sys.stderr)
+
+    flagged = [result["name"] for result in results if result["super_linear"]]
+    if flagged:
+        print(f"super-linear scaling: {', '.join(flagged)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Measures entering and leaving let blocks: a Brewin program whose main declares --outer locals, then
+runs a while loop --iterations times, each iteration nesting --depth lets that each declare a local
+and set it, with the loop counter incremented in the innermost one.
+
+    python benchmarks/nested_lets.py                      # both engines: 3000 iterations, 3 lets, 9 locals
+    python benchmarks/nested_lets.py --outer 50 --depth 6
+    python benchmarks/nested_lets.py --engine v2 --iterations 20000
+
+Reports the fastest of --repeat runs per engine, as a total and per iteration (the loop's own work
+included). Entering a let should cost the same however many variables are live, so the time per
+iteration shouldn't grow with --outer.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# pylint: disable=wrong-import-position
+import interpreterv2
+import interpreterv3
+
+ENGINES = {"v2": interpreterv2, "v3": interpreterv3}
+
+
+def generate_program(outer, depth, iterations):
+    outer_locals = " ".join(f"(int o{i} 0)" for i in range(outer))
+    body = "(set i (+ i 1))"
+    for level in reversed(range(depth)):
+        body = f"(let ((int l{level} 0)) (set l{level} {level}) {body})"
+    lines = [
+        "(class main",
+        " (method void main ()",
+        f"  (let ((int i 0) {outer_locals})",
+        "   (begin",
+        f"    (while (< i {iterations}) {body})",
+        "    (print i)))))",
+    ]
+    return [line + "\n" for line in lines]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time nested let blocks inside a while loop.")
+    parser.add_argument("--outer", type=int, default=9, help="locals live outside the loop")
+    parser.add_argument("--depth", type=int, default=3, help="lets nested in each iteration")
+    parser.add_argument("--iterations", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per engine; the fastest counts")
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES),
+                        help="engine to time (repeatable; default: both)")
+    parser.add_argument("--output", help="write the timings to this JSON file")
+    args = parser.parse_args(argv)
+
+    program = generate_program(args.outer, args.depth, args.iterations)
+    results = {}
+    status = 0
+    for engine in args.engine or sorted(ENGINES):
+        module = ENGINES[engine]
+        best = None
+        for _ in range(args.repeat):
+            interpreter = module.Interpreter(console_output=False)
+            start = time.perf_counter()
+            interpreter.run(program)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        if [str(line) for line in interpreter.get_output()] != [str(args.iterations)]:
+            print(f"{engine}: wrong output {interpreter.get_output()}", file=sys.stderr)
+            status = 1
+        results[engine] = {"seconds": best, "us_per_iteration": best / args.iterations * 1e6}
+        print(f"{engine}: {best:.3f}s, {best / args.iterations * 1e6:.1f}us per iteration")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"outer": args.outer, "depth": args.depth, "iterations": args.iterations,
+                       "results": results}, f, indent=2)
+            f.write("\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Measures `new` of a class deep in a wide hierarchy: a Brewin program whose main creates the most
+derived of --levels classes, each inheriting from the previous one and declaring --fields fields of
+its own, --count times in a loop.
+
+    python benchmarks/new_objects.py                      # v3: 2000 news, 10 levels of 55 fields
+    python benchmarks/new_objects.py --levels 20 --fields 100 --count 500
+    python benchmarks/new_objects.py --engine v2 --count 20
+
+Reports the fastest of --repeat runs, as a total and per `new` (the loop's own work included). The
+v2 engine is much slower at this (tens of milliseconds per new at the default sizes), so it only
+runs when asked for.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# pylint: disable=wrong-import-position
+import interpreterv2
+import interpreterv3
+
+ENGINES = {"v2": interpreterv2, "v3": interpreterv3}
+
+FIELD_TYPES = [("int", "0"), ("string", "\"\""), ("bool", "false")]
+
+
+def generate_program(levels, fields, count):
+    lines = []
+    for level in range(levels):
+        inherits = f" inherits c{level - 1}" if level else ""
+        lines.append(f"(class c{level}{inherits}")
+        for i in range(fields):
+            field_type, default = FIELD_TYPES[i % len(FIELD_TYPES)]
+            lines.append(f" (field {field_type} f{level}_{i} {default})")
+        lines.append(f" (method int level () (return {level})))")
+    lines += [
+        "(class main",
+        f" (field c{levels - 1} obj null)",
+        " (method void main ()",
+        "  (let ((int i 0))",
+        "   (begin",
+        f"    (while (< i {count}) (begin (set obj (new c{levels - 1})) (set i (+ i 1))))",
+        "    (print (call obj level))))))",
+    ]
+    return [line + "\n" for line in lines]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time `new` of a class deep in a wide hierarchy.")
+    parser.add_argument("--levels", type=int, default=10)
+    parser.add_argument("--fields", type=int, default=55, help="fields declared by each class")
+    parser.add_argument("--count", type=int, default=2000, help="objects created per run")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per engine; the fastest counts")
+    parser.add_argument("--engine", action="append", choices=sorted(ENGINES),
+                        help="engine to time (repeatable; default: v3)")
+    parser.add_argument("--output", help="write the timings to this JSON file")
+    args = parser.parse_args(argv)
+
+    program = generate_program(args.levels, args.fields, args.count)
+    results = {}
+    for engine in args.engine or ["v3"]:
+        module = ENGINES[engine]
+        best = None
+        for _ in range(args.repeat):
+            interpreter = module.Interpreter(console_output=False)
+            start = time.perf_counter()
+            interpreter.run(program)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[engine] = {"seconds": best, "us_per_new": best / args.count * 1e6}
+        print(f"{engine}: {best:.3f}s, {best / args.count * 1e6:.1f}us per new")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"levels": args.levels, "fields": args.fields, "count": args.count, "results": results},
+                      f, indent=2)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
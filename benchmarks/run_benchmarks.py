@@ -0,0 +1,231 @@
+"""
+Runs the macro benchmark suite: representative Brewin workloads, each executed with both
+interpreterv2.Interpreter and interpreterv3.Interpreter.
+
+Every (workload, engine) pair runs in its own Python process, so peak RSS is per pair. For each
+pair the runner reports the wall time (min and median over --reps runs), the peak RSS, and the
+peak bytes allocated (traced with tracemalloc in a separate, untimed run), as JSON.
+
+    python benchmarks/run_benchmarks.py                      # run everything, print JSON
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+
+With --baseline, each fastest time (less sensitive to noise than the median) is compared with the
+stored one, and the run fails (exit status 1) if any is slower by more than --threshold. Timings
+are only comparable on the same machine, so regenerate the baseline with --save-baseline when
+moving to another one.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+
+ENGINES = {
+    "v2": "interpreterv2",
+    "v3": "interpreterv3",
+}
+
+# hand-written workloads, in benchmarks/<name>.brewin
+PROGRAM_FILES = ["fib", "nested_loops", "linked_list", "strings", "input_parse"]
+# workloads whose program is generated by a function below
+GENERATED_PROGRAMS = ["deep_dispatch"]
+WORKLOADS = PROGRAM_FILES + GENERATED_PROGRAMS
+
+INPUT_RECORDS = 10000
+DISPATCH_DEPTH = 16
+DISPATCH_CALLS = 6000
+
+
+def generate_deep_dispatch(depth=DISPATCH_DEPTH, calls=DISPATCH_CALLS):
+    """
+    A hierarchy of depth classes, each overriding step(), called through a reference to the base
+    class; plus methods defined only in the base class and halfway down, called on the most derived
+    object, so lookups walk the super chain.
+    """
+    lines = [
+        "(class level0",
+        " (field int hits 0)",
+        " (method int step ((int x)) (return (+ x 1)))",
+        " (method int base_only ((int x)) (begin (set hits (+ hits 1)) (return (* x 2)))))",
+    ]
+    for level in range(1, depth):
+        middle_method = ""
+        if level == depth // 2:
+            middle_method = " (method int middle ((int x)) (return (- x 3)))"
+        lines.append(
+            f"(class level{level} inherits level{level - 1}"
+            f" (method int step ((int x)) (return (+ x {level}))){middle_method})"
+        )
+    lines += [
+        "(class main",
+        " (method void main ()",
+        "  (let ((level0 obj null) (int i 0) (int total 0))",
+        "   (begin",
+        f"    (set obj (new level{depth - 1}))",
+        f"    (while (< i {calls})",
+        "     (begin",
+        "      (set total (% (+ total (call obj step i)) 1000003))",
+        "      (set total (% (+ total (call obj base_only i)) 1000003))",
+        "      (set total (% (+ total (call obj middle i)) 1000003))",
+        "      (set i (+ i 1))))",
+        "    (print total)))))",
+    ]
+    return [line + "\n" for line in lines]
+
+
+def load_workload(name):
+    """Get the program (a list of source lines) and the input (a list of strings, or None) of a workload."""
+    if name == "deep_dispatch":
+        return generate_deep_dispatch(), None
+    with open(os.path.join(BENCHMARK_DIR, name + ".brewin")) as f:
+        program = f.readlines()
+    inp = None
+    if name == "input_parse":
+        inp = [str(INPUT_RECORDS)]
+        for i in range(INPUT_RECORDS):
+            inp += [f"record{i}", str(i * 7919 % 100003)]
+    return program, inp
+
+
+def run_child(workload, engine, reps):
+    """Measure one (workload, engine) pair in this process and print the result as JSON."""
+    import resource
+    import tracemalloc
+
+    sys.path.insert(0, REPO_DIR)
+    sys.setrecursionlimit(100000)
+    module = __import__(ENGINES[engine])
+    program, inp = load_workload(workload)
+
+    times = []
+    output = None
+    for _ in range(reps):
+        interpreter = module.Interpreter(console_output=False, inp=list(inp) if inp else None)
+        start = time.perf_counter()
+        interpreter.run(program)
+        times.append(time.perf_counter() - start)
+        output = interpreter.get_output()
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    tracemalloc.start()
+    interpreter = module.Interpreter(console_output=False, inp=list(inp) if inp else None)
+    interpreter.run(program)
+    _, alloc_peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "workload": workload,
+        "engine": engine,
+        "reps": reps,
+        "wall_time_min": min(times),
+        "wall_time_median": statistics.median(times),
+        "peak_rss_kb": peak_rss_kb,
+        "alloc_peak_bytes": alloc_peak_bytes,
+        "output": [str(line) for line in output[-3:]],
+    }
+    print(json.dumps(result))
+
+
+def run_pair(workload, engine, reps):
+    """Run one (workload, engine) pair in a child process and get its result."""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", workload, engine, str(reps)],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        return {"workload": workload, "engine": engine, "error": completed.stderr.strip()[-2000:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """
+    Get (workload, engine, baseline time, time) for every result whose fastest time is slower than
+    the baseline's by more than threshold.
+    """
+    baseline_times = {
+        (entry["workload"], entry["engine"]): entry["wall_time_min"]
+        for entry in baseline["results"]
+        if "wall_time_min" in entry
+    }
+    regressions = []
+    for result in results:
+        key = (result["workload"], result["engine"])
+        if key not in baseline_times or "wall_time_min" not in result:
+            continue
+        if result["wall_time_min"] > baseline_times[key] * (1 + threshold):
+            regressions.append((*key, baseline_times[key], result["wall_time_min"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Brewin macro benchmark suite.")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="comma-separated engines (v2,v3)")
+    parser.add_argument("--workloads", default=",".join(WORKLOADS), help="comma-separated workloads")
+    parser.add_argument("--reps", type=int, default=5, help="timed runs per workload and engine")
+    parser.add_argument("--output", help="write the results to this JSON file instead of stdout")
+    parser.add_argument("--baseline", help="compare with the results stored in this JSON file")
+    parser.add_argument("--save-baseline", help="store the results as the baseline in this JSON file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed slowdown against the baseline (default 0.10 = 10%%)")
+    parser.add_argument("--child", nargs=3, metavar=("WORKLOAD", "ENGINE", "REPS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        workload, engine, reps = args.child
+        run_child(workload, engine, int(reps))
+        return 0
+
+    results = []
+    for workload in args.workloads.split(","):
+        outputs = {}
+        for engine in args.engines.split(","):
+            result = run_pair(workload, engine, args.reps)
+            results.append(result)
+            outputs[engine] = result.get("output")
+            print(f"{workload:>14} {engine}: "
+                  + (f"{result['wall_time_median']:.3f}s median" if "error" not in result else "error"),
+                  file=sys.stderr)
+        if len(set(json.dumps(output) for output in outputs.values())) > 1:
+            print(f"{workload}: the engines' outputs differ: {outputs}", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(text + "\n")
+
+    status = 1 if any("error" in result for result in results) else 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        for workload, engine, before, after in regressions:
+            print(f"regression: {workload} on {engine}: {before:.3f}s -> {after:.3f}s", file=sys.stderr)
+        if regressions:
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
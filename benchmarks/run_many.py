@@ -0,0 +1,142 @@
+"""
+Measures running one program many times with different inputs on the v3 interpreter, three ways:
+
+- parse: a new Interpreter runs the source each time, so every run parses and loads the program
+- loaded: the program is loaded once (Interpreter.load), and a new Interpreter runs the LoadedProgram
+- reset: the program is loaded once, and a single Interpreter runs it, with reset(inp) between runs
+- threads1, threads4: a ProgramExecutor (executor.py) with 1 or 4 threads, sharing one loaded program
+
+    python benchmarks/run_many.py                            # 10,000 runs of a generated program
+    python benchmarks/run_many.py --program prog.brewin --input 5 --runs 1000
+
+Without --program, the program is generated: classes sized like a typical test program, whose main
+reads one number and does a little work with it. Every way has to produce the same output.
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# pylint: disable=wrong-import-position
+from executor import ProgramExecutor
+from interpreterv3 import Interpreter
+
+
+def generate_program(classes=8):
+    """A program of a few classes, each with a field and a couple of methods, called from main."""
+    lines = []
+    for i in range(classes):
+        lines += [
+            f"(class shape{i}",
+            f" (field int scale {i + 1})",
+            " (method int area ((int n)) (return (* n scale)))",
+            " (method bool big ((int n)) (return (> (call me area n) 100))))",
+        ]
+    lines += [
+        "(class main",
+        " (method void main ()",
+        "  (let ((int n 0) (int total 0))",
+        "   (begin",
+        "    (inputi n)",
+    ]
+    for i in range(classes):
+        lines.append(f"    (set total (+ total (call (new shape{i}) area n)))")
+    lines += [
+        "    (if (call (new shape0) big total) (print \"big \" total) (print \"small \" total))))))",
+    ]
+    return [line + "\n" for line in lines]
+
+
+def run_once(interpreter, program):
+    """Run program and get its output and error (the program may fail, like the ones in the tests)."""
+    try:
+        interpreter.run(program)
+    except RuntimeError:
+        pass
+    return interpreter.get_output(), interpreter.get_error_type_and_line()
+
+
+def run_parse(program, inputs):
+    outputs = []
+    for inp in inputs:
+        outputs.append(run_once(Interpreter(console_output=False, inp=inp), program))
+    return outputs
+
+
+def run_loaded(program, inputs):
+    loaded = Interpreter(console_output=False).load(program)
+    outputs = []
+    for inp in inputs:
+        outputs.append(run_once(Interpreter(console_output=False, inp=inp), loaded))
+    return outputs
+
+
+def run_reset(program, inputs):
+    interpreter = Interpreter(console_output=False)
+    loaded = interpreter.load(program)
+    outputs = []
+    for inp in inputs:
+        interpreter.reset(inp)
+        outputs.append(run_once(interpreter, loaded))
+    return outputs
+
+
+def run_threads(program, inputs, threads):
+    with ProgramExecutor(threads) as executor:
+        results = executor.map((program, inp) for inp in inputs)
+        return [(result.output, (result.error_type, result.error_line)) for result in results]
+
+
+WAYS = {
+    "parse": run_parse,
+    "loaded": run_loaded,
+    "reset": run_reset,
+    "threads1": functools.partial(run_threads, threads=1),
+    "threads4": functools.partial(run_threads, threads=4),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time many runs of one Brewin program.")
+    parser.add_argument("--program", help="source file to run (default: a generated program)")
+    parser.add_argument("--input", action="append", help="an input line for every run (repeatable)")
+    parser.add_argument("--runs", type=int, default=10000)
+    parser.add_argument("--output", help="write the timings to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.program:
+        with open(args.program) as f:
+            program = f.readlines()
+        inputs = [list(args.input or [])] * args.runs
+    else:
+        program = generate_program()
+        inputs = [[str(i % 50)] for i in range(args.runs)]
+
+    results = {}
+    outputs = {}
+    for name, way in WAYS.items():
+        start = time.perf_counter()
+        outputs[name] = way(program, inputs)
+        elapsed = time.perf_counter() - start
+        results[name] = {"total_seconds": elapsed, "us_per_run": elapsed / args.runs * 1e6}
+        print(f"{name:>8}: {elapsed:.3f}s, {elapsed / args.runs * 1e6:.1f}us per run")
+
+    status = 0
+    if any(output != outputs["parse"] for output in outputs.values()):
+        print("the outputs differ", file=sys.stderr)
+        status = 1
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"runs": args.runs, "program_lines": len(program), "results": results}, f, indent=2)
+            f.write("\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""
+Stress harness: generates programs of extreme shapes and drives Interpreter.run on them at growing
+sizes, to find where the interpreter breaks down.
+
+Shapes (the largest size of each is the target scale):
+- many_classes: up to 10,000 classes
+- deep_chain: an inheritance chain up to 1,000 classes deep
+- many_params: a method with up to 400 parameters
+- deep_let: let blocks nested up to 500 deep
+
+Each (shape, size) runs in its own process, measuring:
+- load time: parsing and loading the program (the fastest of a few runs whose main does nothing)
+- per-operation cost: the extra time per iteration of main's loop over the shape, e.g. one new and
+  one call on the most derived class of the chain
+- memory: peak bytes traced while loading, and the process's peak RSS
+
+A run that hits Python's recursion limit (at the default limit of 1000) is reported as such and
+retried with a raised limit on a thread with a large stack, so its cost can still be measured. A
+shape whose load time or per-operation cost grows faster than expected with its size (fitted on a
+log-log scale) is flagged as super-linear, e.g. a quadratic algorithm in ClassDef, TypeManager, or
+ObjectDef.
+
+    python benchmarks/stress.py                         # every shape, v3 interpreter
+    python benchmarks/stress.py --shapes deep_chain --engine v2 --output stress.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from microbenchmarks import fit_slope
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENGINES = {
+    "v2": "interpreterv2",
+    "v3": "interpreterv3",
+}
+
+RAISED_RECURSION_LIMIT = 1000000
+RAISED_STACK_SIZE = 512 * 1024 * 1024
+CHILD_TIMEOUT = 600  # seconds per (shape, size)
+REPEAT = 3  # timed runs of each program; the fastest is kept
+SLOPE_TOLERANCE = 0.35
+
+
+def many_classes(size, ops):
+    lines = [f"(class c{i} (field int x {i}) (method int get () (return x)))" for i in range(size)]
+    last = f"c{size - 1}"
+    lines.append(_main_loop(f"({last} o null)", ops, f"(set o (new {last})) (set t (+ t (call o get)))"))
+    return lines
+
+
+def deep_chain(size, ops):
+    lines = ["(class c0 (field int f0 0) (method int base () (return 1)))"]
+    for i in range(1, size):
+        lines.append(f"(class c{i} inherits c{i - 1} (field int f{i} {i}))")
+    last = f"c{size - 1}"
+    body = f"(set o (new {last})) (set b o) (set t (+ t (call o base)))"
+    lines.append(_main_loop(f"({last} o null) (c0 b null)", ops, body))
+    return lines
+
+
+def many_params(size, ops):
+    params = " ".join(f"(int a{i})" for i in range(size))
+    args = " ".join(str(i) for i in range(size))
+    lines = [
+        "(class main",
+        f" (method int f ({params}) (return a{size - 1}))",
+    ]
+    lines.append(_main_method(ops, f"(set t (+ t (call me f {args})))"))
+    lines.append(")")
+    return lines
+
+
+def deep_let(size, ops):
+    # (let initial values must be constants)
+    inner = f"(set t (+ t (+ v0 v{size - 1})))"
+    for level in reversed(range(size)):
+        inner = f"(let ((int v{level} {level})) {inner})"
+    return ["(class main", _main_method(ops, inner), ")"]
+
+
+def _main_loop(locals_source, ops, body):
+    return "\n".join([
+        "(class main",
+        " (method void main ()",
+        f"  (let ({locals_source} (int i 0) (int t 0))",
+        f"   (begin (while (< i {ops}) (begin {body} (set i (+ i 1)))) (print t)))))",
+    ])
+
+
+def _main_method(ops, body):
+    return (
+        " (method void main ()"
+        f" (let ((int i 0) (int t 0))"
+        f" (begin (while (< i {ops}) (begin {body} (set i (+ i 1)))) (print t))))"
+    )
+
+
+# name -> (generator, sizes, loop iterations for the per-operation cost, expected slope of load time,
+# expected slope of the per-operation cost)
+SHAPES = {
+    "many_classes": (many_classes, [1250, 2500, 5000, 10000], 2000, 1.0, 0.0),
+    "deep_chain": (deep_chain, [125, 250, 500, 1000], 20, 1.0, 1.0),
+    "many_params": (many_params, [50, 100, 200, 400], 200, 1.0, 1.0),
+    "deep_let": (deep_let, [62, 125, 250, 500], 50, 1.0, 1.0),
+}
+
+
+def measure_child(shape, size, engine, raised):
+    """Measure one (shape, size) in this process; returns the result as a dict."""
+    import resource  # pylint: disable=import-outside-toplevel
+    import tracemalloc  # pylint: disable=import-outside-toplevel
+
+    sys.path.insert(0, REPO_DIR)
+    module = __import__(ENGINES[engine])
+    from bparser import BParser  # pylint: disable=import-outside-toplevel
+
+    generator, _, ops, _, _ = SHAPES[shape]
+    idle_program = generator(size, 0)
+    busy_program = generator(size, ops)
+    result = {"shape": shape, "size": size, "engine": engine, "raised_recursion_limit": raised}
+
+    start = time.perf_counter()
+    BParser.parse(idle_program)
+    result["parse_time"] = time.perf_counter() - start
+
+    result["load_time"] = _best_time(module, idle_program)
+    busy_time = _best_time(module, busy_program)
+    result["op_time"] = max(busy_time - result["load_time"], 0.0) / ops
+
+    tracemalloc.start()
+    module.Interpreter(console_output=False).run(idle_program)
+    result["load_alloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def _best_time(module, program):
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        module.Interpreter(console_output=False).run(program)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_child(shape, size, engine, raised):
+    """Entry point of a child process: print the result (or the error) of one (shape, size) as JSON."""
+    outcome = {}
+
+    def measure():
+        try:
+            outcome["result"] = measure_child(shape, size, engine, raised)
+        except RecursionError:
+            outcome["result"] = {"shape": shape, "size": size, "engine": engine, "error": "RecursionError"}
+        except Exception as error:  # pylint: disable=broad-except
+            outcome["result"] = {"shape": shape, "size": size, "engine": engine, "error": repr(error)}
+
+    if not raised:
+        measure()
+    else:
+        # deep recursion needs a deep C stack too, which only a new thread can be given
+        sys.setrecursionlimit(RAISED_RECURSION_LIMIT)
+        threading.stack_size(RAISED_STACK_SIZE)
+        thread = threading.Thread(target=measure)
+        thread.start()
+        thread.join()
+    print(json.dumps(outcome["result"]))
+
+
+def run_size(shape, size, engine):
+    """Measure one (shape, size) in child processes, retrying with a raised recursion limit if needed."""
+    result = _spawn(shape, size, engine, False)
+    if result.get("error") == "RecursionError":
+        retry = _spawn(shape, size, engine, True)
+        retry["recursion_limit_hit"] = True
+        return retry
+    result["recursion_limit_hit"] = False
+    return result
+
+
+def _spawn(shape, size, engine, raised):
+    command = [sys.executable, os.path.abspath(__file__), "--child", shape, str(size), engine]
+    if raised:
+        command.append("--raised")
+    try:
+        completed = subprocess.run(
+            command, capture_output=True, text=True, timeout=CHILD_TIMEOUT, check=False
+        )
+    except subprocess.TimeoutExpired:
+        return {"shape": shape, "size": size, "engine": engine, "error": "timeout"}
+    lines = completed.stdout.strip().splitlines()
+    if completed.returncode != 0 or not lines:
+        # e.g. the interpreter overflowed the C stack and crashed the process
+        return {
+            "shape": shape, "size": size, "engine": engine,
+            "error": f"exit status {completed.returncode}: {completed.stderr.strip()[-500:]}",
+        }
+    return json.loads(lines[-1])
+
+
+def analyze(shape, results):
+    """Summarize the results of one shape: the slopes, what broke, and whether it scales badly."""
+    _, _, _, expected_load_slope, expected_op_slope = SHAPES[shape]
+    measured = [result for result in results if "error" not in result]
+    sizes = [result["size"] for result in measured]
+    load_slope = fit_slope(sizes, [result["load_time"] for result in measured])
+    op_slope = fit_slope(sizes, [result["op_time"] for result in measured])
+    summary = {
+        "shape": shape,
+        "load_time_slope": load_slope,
+        "op_time_slope": op_slope,
+        "recursion_limit_hit_at": [r["size"] for r in results if r.get("recursion_limit_hit")],
+        "failed_at": [r["size"] for r in results if "error" in r],
+        "super_linear_load": load_slope is not None and load_slope > expected_load_slope + SLOPE_TOLERANCE,
+        "super_linear_ops": op_slope is not None and op_slope > expected_op_slope + SLOPE_TOLERANCE,
+    }
+    return summary
+
+
+def describe(result):
+    if "error" in result:
+        return f"{result['size']:>7}: FAILED ({result['error']})"
+    note = " (hit the default recursion limit)" if result.get("recursion_limit_hit") else ""
+    return (
+        f"{result['size']:>7}: parse {result['parse_time']:.3f}s, load {result['load_time']:.3f}s, "
+        f"{result['op_time'] * 1e6:.1f}us/op, load peak {result['load_alloc_peak_bytes'] / 1e6:.1f}MB, "
+        f"rss {result['peak_rss_kb'] / 1024:.0f}MB{note}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress the Brewin interpreter with huge programs.")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help="comma-separated shapes")
+    parser.add_argument("--engine", default="v3", choices=sorted(ENGINES))
+    parser.add_argument("--max-size", type=int, help="skip sizes above this")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--child", nargs=3, metavar=("SHAPE", "SIZE", "ENGINE"), help=argparse.SUPPRESS)
+    parser.add_argument("--raised", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        shape, size, engine = args.child
+        run_child(shape, int(size), engine, args.raised)
+        return 0
+
+    report = {"engine": args.engine, "shapes": []}
+    status = 0
+    for shape in args.shapes.split(","):
+        sizes = [size for size in SHAPES[shape][1] if args.max_size is None or size <= args.max_size]
+        if not sizes:
+            continue
+        print(f"{shape}:")
+        results = []
+        for size in sizes:
+            result = run_size(shape, size, args.engine)
+            results.append(result)
+            print(describe(result))
+        summary = analyze(shape, results)
+        flags = [name for name in ("super_linear_load", "super_linear_ops") if summary[name]]
+        if summary["recursion_limit_hit_at"]:
+            flags.append(f"recursion limit at sizes {summary['recursion_limit_hit_at']}")
+        if summary["failed_at"]:
+            flags.append(f"failed at sizes {summary['failed_at']}")
+        slopes = ", ".join(
+            f"{name} slope {summary[key]:.2f}"
+            for name, key in (("load", "load_time_slope"), ("per-op", "op_time_slope"))
+            if summary[key] is not None
+        )
+        print(f"  {slopes}" + (f"; FLAGGED: {'; '.join(flags)}" if flags else "") + "\n")
+        if summary["super_linear_load"] or summary["super_linear_ops"] or summary["failed_at"]:
+            status = 1
+        report["shapes"].append({"summary": summary, "results": results})
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
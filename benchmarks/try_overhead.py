@@ -0,0 +1,102 @@
+"""
+Measures what try blocks cost a Brewin program that never throws, on both engines: the same hot loop
+runs with no try, with a try around each iteration's work, and with a try in the method it calls.
+One more variant, which is the try in the loop with the called method throwing on one iteration in 100,
+shows what throws cost.
+
+    python benchmarks/try_overhead.py                     # 20,000 iterations, fastest of 5 runs
+    python benchmarks/try_overhead.py --iterations 50000 --repeat 9
+
+A try is a statement itself, so it costs what any one statement costs to dispatch; what it mustn't
+do is slow down the statements inside it. So the loop without try wraps its work in a begin instead,
+and the variants execute the same statements but for try in place of begin. Each variant's time is
+reported with its ratio to the variant without try, and every variant has to print the same total.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# pylint: disable=wrong-import-position
+import interpreterv2
+import interpreterv3
+
+ENGINES = {"v2": interpreterv2, "v3": interpreterv3}
+
+# each variant's loop body and the remainder mod 100 of the iterations on which step throws (-1: none);
+# step returns i * 2, and so do the catch statements, so all the variants compute the same total
+VARIANTS = {
+    "no try": ("(begin (set total (+ total (call me step i))))", -1),
+    "try in loop": ("(try (set total (+ total (call me step i))) (set total (+ total (* i 2))))", -1),
+    "try in callee": ("(set total (+ total (call me guarded_step i)))", -1),
+    "throwing": ("(try (set total (+ total (call me step i))) (set total (+ total (* i 2))))", 0),
+}
+
+
+def generate_program(loop_body, throw_at, iterations):
+    lines = [
+        "(class main",
+        f" (field int throw_at {throw_at})",
+        " (method int step ((int i))",
+        "  (begin (begin (if (== (% i 100) throw_at) (throw \"hundred\")) (return (* i 2)))))",
+        " (method int guarded_step ((int i))",
+        "  (try (begin (if (== (% i 100) throw_at) (throw \"hundred\")) (return (* i 2))) (return -1)))",
+        " (method void main ()",
+        "  (let ((int i 0) (int total 0))",
+        "   (begin",
+        f"    (while (< i {iterations})",
+        f"     (begin {loop_body} (set i (+ i 1))))",
+        "    (print total)))))",
+    ]
+    return [line + "\n" for line in lines]
+
+
+def time_variant(module, program, repeat):
+    best = None
+    output = None
+    for _ in range(repeat):
+        interpreter = module.Interpreter(console_output=False)
+        start = time.perf_counter()
+        interpreter.run(program)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        output = interpreter.get_output()
+    return best, [str(line) for line in output]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time Brewin loops with and without try blocks.")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each variant; the fastest counts")
+    parser.add_argument("--output", help="write the timings to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    status = 0
+    for engine, module in ENGINES.items():
+        results[engine] = {}
+        outputs = set()
+        for variant, (loop_body, throw_at) in VARIANTS.items():
+            program = generate_program(loop_body, throw_at, args.iterations)
+            elapsed, output = time_variant(module, program, args.repeat)
+            outputs.add(tuple(output))
+            ratio = elapsed / results[engine]["no try"]["seconds"] if results[engine] else 1.0
+            results[engine][variant] = {"seconds": elapsed, "ratio": ratio}
+            print(f"{engine} {variant:>13}: {elapsed * 1e3:8.1f}ms  {ratio:.3f}x")
+        if len(outputs) != 1:
+            print(f"{engine}: the variants' outputs differ: {sorted(outputs)}", file=sys.stderr)
+            status = 1
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"iterations": args.iterations, "results": results}, f, indent=2)
+            f.write("\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+"""
+Module with the exception that a Brewin program's (throw expression) statement raises, shared by
+both engines.
+"""
+
+from intbase import ErrorType
+
+
+class BrewinException(Exception):
+    """
+    Raised by a program's (throw expression) statement, and caught by the innermost (try ...) around
+    it, in the same method or in any of its callers. The interpreters reach the try by ordinary Python
+    unwinding, so statements don't check for a pending exception as they run.
+    """
+
+    def __init__(self, value, line_num):
+        super().__init__(value)
+        self.value = value  # the string thrown
+        self.line_num = line_num  # of the throw
+
+
+def report_uncaught(interpreter, exception):
+    """
+    End the run of interpreter (an InterpreterBase) with a fault error at the throw of exception, a
+    BrewinException that no try caught.
+    """
+    interpreter.error(
+        ErrorType.FAULT_ERROR, f"uncaught exception {exception.value}", exception.line_num
+    )
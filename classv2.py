@@ -78,6 +78,7 @@ class ClassDef:
         self.name = class_def[1]
         self.parent_class = None
         self.children = []
+        self.method_resolution_cache = {}  # method name -> (ClassDef, MethodDef), see find_method()
         if class_def[2] == InterpreterBase.INHERITS_DEF:
             self.parent_class = self.interpreter.class_index[class_def[3]]
             self.__create_field_list(class_def[4:])
@@ -98,7 +99,24 @@ class ClassDef:
         Get a list of MethodDefs for *all* fields in the class.
         """
         return self.methods
-        
+
+    def find_method(self, method_name):
+        """
+        Find the most derived definition of a method, starting from this class and walking up
+        its superclasses. Returns a (ClassDef, MethodDef) pair, where the MethodDef is None if
+        no class in the chain defines the method (the ClassDef is then the base class).
+        Results are cached, so each name is only resolved once per class.
+        """
+        resolved = self.method_resolution_cache.get(method_name)
+        if resolved is None:
+            class_def = self
+            while class_def.parent_class is not None and \
+                    method_name not in class_def.method_map:
+                class_def = class_def.parent_class
+            resolved = (class_def, class_def.method_map.get(method_name))
+            self.method_resolution_cache[method_name] = resolved
+        return resolved
+
     def is_parent_class_of(self, other):
         if self is other:
             return True
@@ -126,9 +144,11 @@ class ClassDef:
         while parent != None:
             self.fields = self.fields + parent.get_fields()
             parent = parent.parent_class
+        self.field_names = frozenset(x.field_name for x in self.fields)  # for objectv2.FieldView
 
     def __create_method_list(self, class_body):
         self.methods = []
+        self.method_map = {}
         methods_defined_so_far = set()
         for member in class_body:
             if member[0] == InterpreterBase.METHOD_DEF:
@@ -138,5 +158,7 @@ class ClassDef:
                         "duplicate method " + member[2],
                         member[0].line_num,
                     )
-                self.methods.append(MethodDef(member))
+                method_def = MethodDef(member)
+                self.methods.append(method_def)
+                self.method_map[method_def.method_name] = method_def
                 methods_defined_so_far.add(member[2])
@@ -36,7 +36,7 @@
 """
 
 from intbase import InterpreterBase, ErrorType
-from type_valuev2 import Type, create_value
+from type_valuev3 import Type, create_value
 
 class VariableDef:
     # var_type is a Type() and value is a Value()
@@ -61,6 +61,8 @@ class MethodDef:
             self.return_type = Type(method_source[1])
         self.formal_params = self.__parse_params(method_source[3])
         self.code = method_source[4]
+        # number of variable slots a call needs: the params plus the most let locals alive at once
+        self.frame_size = len(self.formal_params) + self.__max_let_locals(self.code)
 
     def get_method_name(self):
         return self.method_name
@@ -84,6 +86,19 @@ class MethodDef:
             formal_params.append(var_def)
         return formal_params
 
+    # the largest number of let locals in scope at the same time anywhere in the statement
+    # (let ((type1 var1 val1) ...) (statement1) ...) adds its locals to those of the enclosing lets, and
+    # (try statement catch_statement) adds the exception variable
+    def __max_let_locals(self, code):
+        if not isinstance(code, list) or not code:
+            return 0
+        nested = max((self.__max_let_locals(item) for item in code), default=0)
+        if code[0] == InterpreterBase.LET_DEF:
+            return len(code[1]) + nested
+        if code[0] == InterpreterBase.TRY_DEF:
+            return 1 + nested
+        return nested
+
 
 # holds definition for a class, including a list of all the fields and their default values, all
 # of the methods in the class, and the superclass information (if any)
@@ -142,6 +157,7 @@ class ClassDef:
     def __create_field_list(self, class_body):
         self.fields = []  # array of VariableDefs with default values set
         self.field_map = {}
+        self.field_slots = {}  # maps each field name to its index in self.fields
         fields_defined_so_far = set()
         for member in class_body:
             # member format is [field typename varname default_value]
@@ -153,9 +169,13 @@ class ClassDef:
                         member[0].line_num,
                     )
                 var_def = self.__create_variable_def_from_field(member)
+                self.field_slots[member[2]] = len(self.fields)
                 self.fields.append(var_def)
                 self.field_map[member[2]] = var_def
                 fields_defined_so_far.add(member[2])
+        # default values are never mutated in place (assignment replaces the Value), so every object of
+        # this class can start from a single copy of this vector rather than copying each VariableDef
+        self.default_field_values = tuple(var_def.value for var_def in self.fields)
 
     # field def: [field typename varname defvalue]
     # returns a VariableDef object that represents that field
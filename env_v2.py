@@ -10,25 +10,54 @@ class EnvironmentManager:
     in a brewin program and the value of that variable - the value that's passed in can be
     anything you like. In our implementation we pass in a Value object which holds a type
     and a value (e.g., Int, 10).
+
+    Each block (the method body, then one per nested let) gets its own mapping, so entering
+    or leaving a block takes constant time no matter how many variables are live.
     """
 
     def __init__(self):
-        self.environment = {}
+        self.environment = [{}]
 
     def get(self, symbol):
         """
-        Get data associated with variable name.
+        Get data associated with variable name, looking in the innermost block first.
         """
-        if symbol in self.environment:
-            return self.environment[symbol]
+        for env in reversed(self.environment):
+            if symbol in env:
+                return env[symbol]
 
         return None
 
     def set(self, symbol, value):
         """
-        Set data associated with a variable name.
+        Set data associated with a variable name, in the innermost block that defines it.
+        If no block defines it, it's created in the innermost block.
+        """
+        for env in reversed(self.environment):
+            if symbol in env:
+                env[symbol] = value
+                return
+
+        self.environment[-1][symbol] = value
+
+    def create_new_symbol(self, symbol, value):
+        """
+        Create a variable in the innermost block, shadowing any variable with the same name
+        in the enclosing blocks.
+        """
+        self.environment[-1][symbol] = value
+
+    def block_nest(self):
+        """
+        Enter a nested block.
+        """
+        self.environment.append({})
+
+    def block_unnest(self):
+        """
+        Leave a nested block, discarding the variables created in it.
         """
-        self.environment[symbol] = value
+        self.environment.pop()
 
     #def __str__(self):
         #print(self.environment)
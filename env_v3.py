@@ -1,48 +1,98 @@
-class EnvironmentManager:
+class Frame:
     """
-    The EnvironmentManager class keeps a mapping between each variable name (aka symbol)
-    in a brewin program and the VariableDef object, which stores the variable name, its type, and
-    the current value that the variable is set to (which could be the same type or a subtype of
-    the variable, in the case of object references).
+    A Frame holds the parameters and locals of one method call. Every variable lives in a slot of a
+    preallocated array (sized by MethodDef.frame_size), which stores its type and its current value
+    (which could be the same type or a subtype of the variable, in the case of object references).
+    Formal parameters take the first slots; each let block takes the next range of slots on entry and
+    gives them back on exit, so nested blocks are just ranges of the same array.
     """
 
-    def __init__(self):
-        self.environment = [{}]
+    def __init__(self, size):
+        self.types = [None] * size
+        self.values = [None] * size
+        self.symbols = {}  # maps each visible symbol to the slot of its innermost binding
+        self.top = 0  # first free slot
+        self.shadowed = []  # (symbol, slot it shadowed or None) for every live binding, in binding order
+        self.blocks = []  # (top, len(shadowed)) saved by each block_nest()
 
-    # returns a VariableDef object
+    # returns the slot holding the symbol, or None if the symbol isn't defined in any enclosing block
     def get(self, symbol):
-        for env in reversed(self.environment):
-            if symbol in env:
-                return env[symbol]
+        return self.symbols.get(symbol)
 
-        return None
-
-    # create a new symbol in the most nested block's environment; error if
+    # create a new symbol in the most nested block, holding the passed-in type and Value; error if
     # the symbol already exists in the most nested block
     # this is called for all variables defined in a let block or in formal parameters
-    def create_new_symbol(self, symbol):
-        if symbol not in self.environment[-1]:
-            self.environment[-1][symbol] = None
-            return True
-
-        return False
-
-    # set works with symbols that were already created via create_new_symbol().
-    # this won't create a new symbol, only update its value to a new Value object
-    # returns False if the set failed due to an unknown variable that wasn't found in any
-    # of the nested blocks of the current function
-    def set(self, symbol, value):
-        for env in reversed(self.environment):
-            if symbol in env:
-                env[symbol] = value
-                return True
-
-        return False
-
-    # used when we enter a nested block to create a new environment for that block
+    def create_new_symbol(self, symbol, var_type, value):
+        prev_slot = self.symbols.get(symbol)
+        block_start = self.blocks[-1][0] if self.blocks else 0
+        if prev_slot is not None and prev_slot >= block_start:
+            return False
+
+        slot = self.top
+        if slot == len(self.values):  # only if the frame was sized too small; grow rather than fail
+            self.types.append(None)
+            self.values.append(None)
+        self.types[slot] = var_type
+        self.values[slot] = value
+        self.symbols[symbol] = slot
+        self.shadowed.append((symbol, prev_slot))
+        self.top = slot + 1
+        return True
+
+    # used when we enter a nested block; the block's locals take the slots from the current top
     def block_nest(self):
-        self.environment.append({})  # [{}] -> [{}, {}]
+        self.blocks.append((self.top, len(self.shadowed)))
 
-    # used when we exit a nested block to discard the environment for that block
+    # used when we exit a nested block to discard its locals and make shadowed symbols visible again
     def block_unnest(self):
-        self.environment.pop()
\ No newline at end of file
+        top, num_shadowed = self.blocks.pop()
+        shadowed = self.shadowed
+        symbols = self.symbols
+        while len(shadowed) > num_shadowed:
+            symbol, prev_slot = shadowed.pop()
+            if prev_slot is None:
+                del symbols[symbol]
+            else:
+                symbols[symbol] = prev_slot
+        self.__clear_slots(top)
+
+    # empties the frame so it can be reused for another call
+    def reset(self):
+        self.symbols.clear()
+        self.shadowed.clear()
+        self.blocks.clear()
+        self.__clear_slots(0)
+
+    # drop the values in slots [start, top) so the frame doesn't keep objects alive
+    def __clear_slots(self, start):
+        values = self.values
+        for slot in range(start, self.top):
+            values[slot] = None
+        self.top = start
+
+
+class FramePool:
+    """
+    Free list of Frames, so a method call reuses the frame of a call that already returned instead of
+    allocating a new one.
+    """
+
+    # new_frame(size) creates a frame when none is free
+    def __init__(self, new_frame=Frame):
+        self.new_frame = new_frame
+        self.free_frames = []
+
+    # returns an empty Frame with at least size slots
+    def acquire(self, size):
+        if not self.free_frames:
+            return self.new_frame(size)
+        frame = self.free_frames.pop()
+        missing = size - len(frame.values)
+        if missing > 0:
+            frame.types.extend([None] * missing)
+            frame.values.extend([None] * missing)
+        return frame
+
+    def release(self, frame):
+        frame.reset()
+        self.free_frames.append(frame)
@@ -0,0 +1,152 @@
+"""
+Module for running Brewin programs from many threads of one process, e.g. in a threaded service that
+embeds the interpreter: a ProgramCache that loads each program once and shares the LoadedProgram
+(interpreterv3.py) between threads, and a ProgramExecutor that runs jobs on a pool of threads.
+
+A LoadedProgram isn't changed by running it, and everything a run changes (its output, input position,
+frames and objects) belongs to the Interpreter running it, so threads share the loaded programs and
+each keeps one Interpreter of its own, reset between jobs.
+
+    with ProgramExecutor(max_workers=4) as executor:
+        future = executor.submit(program_lines, ["10"])
+        print(future.result().output)
+        for result in executor.map([(program_lines, ["1"]), (other_lines, [])]):
+            ...
+
+Each result is a BatchResult, as in batch.py. On a free-threaded build of CPython the threads run
+programs in parallel; with the GIL they take turns, as the same jobs would on one thread.
+"""
+
+import collections
+import concurrent.futures
+import threading
+
+from batch import job_input, run_and_report
+from interpreterv3 import Interpreter, TimeLimitExceeded
+
+
+class ProgramCache:
+    """
+    Loaded programs shared by threads, keyed by their source lines (or a key of the caller's), each
+    loaded once even when many threads ask for it at the same time. Holds at most maxsize programs,
+    dropping the least recently used; a program that fails to load isn't kept, so the next get loads it
+    (and fails) again.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.__lock = threading.Lock()
+        self.__programs = collections.OrderedDict()  # key -> Future of the LoadedProgram
+
+    def get(self, program, key=None):
+        """
+        Get the LoadedProgram of program (source lines), loading it unless another thread has or is;
+        raises whatever loading it raised (e.g. RuntimeError for a syntax or name error in the program).
+        """
+        if key is None:
+            key = tuple(program)
+        with self.__lock:
+            future = self.__programs.get(key)
+            if future is not None:
+                self.__programs.move_to_end(key)
+                loader = False
+            else:
+                future = self.__programs[key] = concurrent.futures.Future()
+                if len(self.__programs) > self.maxsize:
+                    self.__programs.popitem(last=False)
+                loader = True
+        if not loader:
+            return future.result()  # waits if another thread is still loading it
+        # loaded outside the lock, so threads loading other programs don't wait for this one
+        try:
+            loaded = Interpreter(console_output=False).load(program)
+        except BaseException as exc:
+            with self.__lock:
+                if self.__programs.get(key) is future:
+                    del self.__programs[key]
+            future.set_exception(exc)
+            raise
+        future.set_result(loaded)
+        return loaded
+
+    def clear(self):
+        """Drop every program; runs already using one aren't affected."""
+        with self.__lock:
+            self.__programs.clear()
+
+    def __len__(self):
+        with self.__lock:
+            return len(self.__programs)
+
+
+class ProgramExecutor:
+    """
+    Runs (program, inp) jobs on a pool of threads sharing a ProgramCache; usable as a context manager,
+    which shuts the pool down on exit.
+    """
+
+    def __init__(self, max_workers=None, cache=None, interpreter_options=None, timeout=None):
+        """
+        max_workers is the number of threads (by default, as for ThreadPoolExecutor); cache is the
+        ProgramCache to load programs into (by default, a new one); interpreter_options are passed on to
+        each thread's Interpreter, and can't turn on tracing or profiling, whose hooks are bound into a
+        loaded program and so can't be shared; timeout, if given, is the limit in seconds on each run
+        (the Interpreter's time_limit, so a run waiting for input isn't stopped).
+        """
+        self.interpreter_options = dict(interpreter_options or {})
+        if timeout is not None:
+            self.interpreter_options["time_limit"] = timeout
+        probe = Interpreter(console_output=False, **self.interpreter_options)
+        if probe.tracer is not None or probe.profiler is not None or probe.sampler is not None:
+            raise ValueError("programs loaded with tracing or profiling can't be shared between threads")
+        self.cache = cache if cache is not None else ProgramCache()
+        self.__pool = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix="brewin")
+        self.__local = threading.local()  # .interpreter: the thread's own Interpreter
+
+    def submit(self, program, inp=None):
+        """
+        Run program (source lines) with inp (a list of input lines or an InputSource) on one of the
+        threads, and get a Future of its BatchResult (with index 0).
+        """
+        return self.__pool.submit(self.__run_job, 0, program, inp)
+
+    def map(self, jobs):
+        """
+        Run jobs, an iterable of (program, inp) pairs, and yield a BatchResult per job, in order; all the
+        jobs are submitted up front.
+        """
+        futures = [self.__pool.submit(self.__run_job, index, program, inp)
+                   for index, (program, inp) in enumerate(jobs)]
+        for future in futures:
+            yield future.result()
+
+    def shutdown(self, wait=True):
+        """Stop taking jobs; with wait, return once the submitted ones have run."""
+        self.__pool.shutdown(wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def __run_job(self, index, program, inp):
+        def get_interpreter():
+            interpreter = getattr(self.__local, "interpreter", None)
+            if interpreter is None:
+                interpreter = self.__local.interpreter = Interpreter(
+                    console_output=False, **self.interpreter_options
+                )
+            interpreter.reset(job_input(inp))
+            return interpreter
+
+        def run(interpreter):
+            try:
+                loaded = self.cache.get(program)
+            except RuntimeError:
+                # run the source instead, so the load error is recorded by this interpreter, as for a run
+                interpreter.run(program)
+            else:
+                interpreter.run(loaded)
+
+        return run_and_report(index, get_interpreter, run, (TimeLimitExceeded,))
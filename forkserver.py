@@ -0,0 +1,205 @@
+"""
+Module with the fork server: a process that imports the interpreter and loads a set of programs once,
+then forks a child for every run request it gets on a Unix socket. Each child starts with the warmed
+state (modules imported, programs parsed and loaded) shared copy-on-write with the server, so a run
+costs a fork instead of starting Python, importing the interpreter, and loading the program.
+
+A request is one line of JSON, sent by a client over its own connection:
+
+    {"program": "name", "input": ["1", "2"]}            # a program the server loaded
+    {"source": ["(class main ...)", ...], "input": []}    # any program, loaded by the child
+
+and the child answers with one line of JSON: the run's output and error, as in batch.py, then exits.
+The server never reads requests itself, so a slow client only holds up its own child.
+
+    python forkserver.py serve --socket /tmp/brewin.sock --program fib=benchmarks/fib.brewin
+    python forkserver.py run --socket /tmp/brewin.sock --program fib --input 10
+"""
+
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+
+from batch import ENGINES, result_to_dict, run_job
+
+
+class ForkServer:
+    """
+    Serves run requests on a Unix socket, forking a child per request.
+    """
+
+    def __init__(self, socket_path, programs=None, engine="v3", timeout=None, interpreter_options=None):
+        """
+        programs maps names to source lines, each loaded now so that requests can run it by name;
+        timeout, if given, is the limit in seconds on each run (a request can ask for a shorter one);
+        interpreter_options are passed on to each Interpreter.
+        """
+        self.socket_path = socket_path
+        self.module = __import__(ENGINES[engine])
+        self.timeout = timeout
+        self.interpreter_options = interpreter_options or {}
+        self.programs = {}  # name -> LoadedProgram (or source lines, for engines that don't have one)
+        for name, program in (programs or {}).items():
+            self.add_program(name, program)
+        self.listener = None
+
+    def add_program(self, name, program):
+        """Load a program (source lines) so requests can run it by name; fails if it doesn't load."""
+        interpreter = self.module.Interpreter(console_output=False, **self.interpreter_options)
+        if not hasattr(interpreter, "load"):
+            self.programs[name] = list(program)
+            return
+        loaded = interpreter.load(program)
+        # a program loaded with tracing or profiling can't be run by the children's own interpreters
+        self.programs[name] = loaded if loaded.instrumented_by is None else list(program)
+
+    def serve_forever(self):
+        """Accept connections until stop() is called (e.g. from a signal handler), forking a child for each."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.socket_path)
+        self.listener.listen(socket.SOMAXCONN)
+        # everything loaded so far lives as long as the server: keep the collector from scanning it, which
+        # in a child would write to (and so copy) every page holding it
+        gc.freeze()
+        previous_handler = signal.signal(signal.SIGCHLD, self.__reap_children)
+        try:
+            while self.listener is not None:
+                try:
+                    conn, _ = self.listener.accept()
+                except OSError:
+                    if self.listener is None:  # stopped while waiting
+                        break
+                    raise
+                pid = os.fork()
+                if pid == 0:
+                    self.__serve_request(conn)  # never returns
+                conn.close()
+        finally:
+            signal.signal(signal.SIGCHLD, previous_handler)
+            self.stop()
+            gc.unfreeze()
+
+    def stop(self):
+        """Stop accepting requests; children already forked finish their runs."""
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def __serve_request(self, conn):
+        status = 0
+        try:
+            self.listener.close()
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            with conn, conn.makefile("rwb") as stream:
+                line = stream.readline()
+                if line:
+                    result = self.__run_request(json.loads(line))
+                    stream.write(json.dumps(result).encode() + b"\n")
+        except BaseException:  # pylint: disable=broad-except
+            status = 1
+        finally:
+            # skip the server's cleanup (atexit handlers, the listener's socket file, ...)
+            os._exit(status)
+
+    def __run_request(self, request):
+        timeout = request.get("timeout", self.timeout)
+        if self.timeout is not None and timeout is not None:
+            timeout = min(timeout, self.timeout)
+        if "source" in request:
+            programs, program_id = {None: request["source"]}, None
+        else:
+            programs, program_id = self.programs, request.get("program")
+            if program_id not in programs:
+                return {"error": f"unknown program {program_id}"}
+        result = run_job(
+            self.module, 0, programs, program_id, request.get("input"), timeout, self.interpreter_options
+        )
+        fields = result_to_dict(result)
+        del fields["index"]
+        return fields
+
+    @staticmethod
+    def __reap_children(signum, frame):
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+
+def request(socket_path, program=None, inp=None, source=None, timeout=None):
+    """
+    Ask the fork server on socket_path to run a program it loaded (by name) or the given source lines,
+    with inp as the input, and get the result as a dict (output, error_type, error_line, error,
+    timed_out, elapsed).
+    """
+    message = {"input": inp}
+    if source is not None:
+        message["source"] = list(source)
+    else:
+        message["program"] = program
+    if timeout is not None:
+        message["timeout"] = timeout
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        with sock.makefile("rwb") as stream:
+            stream.write(json.dumps(message).encode() + b"\n")
+            stream.flush()
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("the fork server's child exited without answering")
+    return json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Brewin programs from a fork server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="start a server")
+    serve.add_argument("--socket", required=True, help="path of the Unix socket to listen on")
+    serve.add_argument("--program", action="append", default=[], metavar="NAME=PATH",
+                       help="load the source file at PATH as NAME (repeatable)")
+    serve.add_argument("--engine", default="v3", choices=sorted(ENGINES))
+    serve.add_argument("--timeout", type=float, help="limit in seconds on each run")
+    run = commands.add_parser("run", help="send a run request to a server and print the result")
+    run.add_argument("--socket", required=True)
+    run.add_argument("--program", help="name of a program the server loaded")
+    run.add_argument("--source", help="source file to run instead")
+    run.add_argument("--input", action="append", help="an input line (repeatable)")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        programs = {}
+        for item in args.program:
+            name, _, path = item.partition("=")
+            with open(path) as f:
+                programs[name] = f.readlines()
+        server = ForkServer(args.socket, programs, args.engine, args.timeout)
+        signal.signal(signal.SIGTERM, lambda signum, frame: server.stop())
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    source = None
+    if args.source:
+        with open(args.source) as f:
+            source = f.readlines()
+    result = request(args.socket, args.program, args.input, source)
+    print(json.dumps(result))
+    return 0 if result.get("error") is None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
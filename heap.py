@@ -0,0 +1,187 @@
+"""
+Module with the heap accounting the interpreter does when it's created with track_heap=True.
+
+Every object created by Interpreter.instantiate (each new, and the main object) is registered with
+the HeapTracker under its class and the line of the new that created it. The tracker only holds
+weak references, so tracking never keeps an object alive; a freed object is dropped from the live
+counts by its weakref callback.
+
+take_snapshot() records the live objects per class, with their approximate size in bytes, and per
+allocation site; snapshots taken at two points of a run can be diffed to see what accumulated.
+"""
+
+import sys
+import time
+import types
+import weakref
+
+from string_rope import StringRope
+from type_valuev3 import Type, Value
+
+# attributes of an ObjectDef that refer to things it doesn't own: the interpreter, data shared by every
+# object of the class, and other parts of the object (which are sized as parts of their anchor)
+SHARED_ATTRIBUTES = frozenset(
+    ["interpreter", "class_def", "methods", "field_slots", "super_object"]
+)
+
+
+class HeapTracker:
+    """
+    Tracks the live Brewin objects of one interpreter.
+    """
+
+    def __init__(self):
+        self.live = {}  # id of the weakref -> (weakref, class name, allocation line)
+        self.live_counts = {}  # class name -> number of live objects
+        self.allocation_counts = {}  # class name -> number of objects ever created
+        self.site_counts = {}  # (class name, allocation line) -> number of live objects
+        self.snapshots = []
+
+    def track(self, obj, line_num):
+        """Start tracking obj, a newly created object, allocated by the statement on line_num."""
+        class_name = str(obj.class_def.name)
+        ref = weakref.ref(obj, self.__on_free)
+        self.live[id(ref)] = (ref, class_name, line_num)
+        self.live_counts[class_name] = self.live_counts.get(class_name, 0) + 1
+        self.allocation_counts[class_name] = self.allocation_counts.get(class_name, 0) + 1
+        site = (class_name, line_num)
+        self.site_counts[site] = self.site_counts.get(site, 0) + 1
+
+    def take_snapshot(self, label=None):
+        """
+        Record the live objects as a HeapSnapshot (also appended to self.snapshots) and return it.
+        Sizing walks every live object, so it costs time proportional to the heap.
+        """
+        classes = {}
+        for ref, class_name, _ in list(self.live.values()):
+            obj = ref()
+            if obj is None:
+                continue
+            stats = classes.get(class_name)
+            if stats is None:
+                stats = classes[class_name] = {"count": 0, "bytes": 0}
+            stats["count"] += 1
+            stats["bytes"] += object_size(obj)
+        snapshot = HeapSnapshot(label, time.time(), classes, dict(self.site_counts))
+        self.snapshots.append(snapshot)
+        return snapshot
+
+    def __on_free(self, ref):
+        _, class_name, line_num = self.live.pop(id(ref))
+        self.live_counts[class_name] -= 1
+        site = (class_name, line_num)
+        self.site_counts[site] -= 1
+        if not self.site_counts[site]:
+            del self.site_counts[site]
+
+
+class HeapSnapshot:
+    """
+    The live objects at one point of a run: per class, their count and approximate total size in
+    bytes, and per allocation site (class name, line number), their count.
+    """
+
+    def __init__(self, label, timestamp, classes, sites):
+        self.label = label
+        self.timestamp = timestamp
+        self.classes = classes
+        self.sites = sites
+
+    def total_count(self):
+        return sum(stats["count"] for stats in self.classes.values())
+
+    def total_bytes(self):
+        return sum(stats["bytes"] for stats in self.classes.values())
+
+    def diff(self, older):
+        """
+        Get what changed since the older snapshot, as a HeapSnapshot of the differences (classes and
+        sites whose numbers didn't change are left out).
+        """
+        classes = {}
+        for class_name in set(self.classes) | set(older.classes):
+            new = self.classes.get(class_name, {"count": 0, "bytes": 0})
+            old = older.classes.get(class_name, {"count": 0, "bytes": 0})
+            delta = {"count": new["count"] - old["count"], "bytes": new["bytes"] - old["bytes"]}
+            if delta["count"] or delta["bytes"]:
+                classes[class_name] = delta
+        sites = {}
+        for site in set(self.sites) | set(older.sites):
+            delta = self.sites.get(site, 0) - older.sites.get(site, 0)
+            if delta:
+                sites[site] = delta
+        label = f"{older.label} -> {self.label}"
+        return HeapSnapshot(label, self.timestamp, classes, sites)
+
+    def to_dict(self):
+        """Get the snapshot as a dict of plain values, e.g. for JSON."""
+        return {
+            "label": self.label,
+            "timestamp": self.timestamp,
+            "classes": self.classes,
+            "sites": [
+                {"class": class_name, "line": line_num, "count": count}
+                for (class_name, line_num), count in self.sites.items()
+            ],
+        }
+
+    def print_report(self, stream=None, limit=20):
+        """Print the classes with the most bytes, then the allocation sites with the most objects."""
+        if stream is None:
+            stream = sys.stdout
+        stream.write(f"heap snapshot {self.label}: {self.total_count()} objects, {self.total_bytes()} bytes\n")
+        stream.write(f"{'count':>10} {'bytes':>12}  class\n")
+        classes = sorted(self.classes.items(), key=lambda item: abs(item[1]["bytes"]), reverse=True)
+        for class_name, stats in classes[:limit]:
+            stream.write(f"{stats['count']:>10} {stats['bytes']:>12}  {class_name}\n")
+        stream.write(f"\n{'count':>10}  allocation site\n")
+        sites = sorted(self.sites.items(), key=lambda item: abs(item[1]), reverse=True)
+        for (class_name, line_num), count in sites[:limit]:
+            stream.write(f"{count:>10}  new {class_name} on line {line_num}\n")
+
+
+def object_size(obj):
+    """
+    Approximate the bytes a Brewin object holds on to by itself: each of its parts (the object and its
+    superclass parts), their lists of field values, the values set in those lists (not the defaults
+    shared by every object of the class), and the parts' weak references to the anchor. What the class
+    shares (method and field slot maps, and ObjectDef's class-level operator tables) isn't included,
+    nor are the objects it refers to; they're counted separately.
+    """
+    size = 0
+    seen = set()
+    part = obj
+    while part is not None:
+        # fields that were never set still hold the Values shared by every object of the class
+        seen.update(id(value) for value in part.class_def.default_field_values)
+        size += sys.getsizeof(part) + sys.getsizeof(part.__dict__)
+        for name, attribute in part.__dict__.items():
+            if name not in SHARED_ATTRIBUTES:
+                size += _owned_size(attribute, seen)
+        part = part.super_object
+    return size
+
+
+def _owned_size(value, seen):
+    if id(value) in seen or value is None or type(value) is bool:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            size += _owned_size(item, seen)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            size += _owned_size(key, seen) + _owned_size(item, seen)
+    elif isinstance(value, Value):
+        size += sys.getsizeof(value.__dict__) + _owned_size(value.t, seen)
+        if type(value.v) is not bool and not hasattr(value.v, "class_def"):  # other objects are sized separately
+            size += _owned_size(value.v, seen)
+    elif isinstance(value, StringRope):
+        size += _owned_size(value.parts, seen)
+    elif isinstance(value, Type):
+        size += sys.getsizeof(value.__dict__)
+    elif isinstance(value, types.FunctionType):
+        # the code is shared by every object; the function object and its closure aren't
+        size += _owned_size(value.__closure__, seen)
+    return size
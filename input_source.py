@@ -0,0 +1,129 @@
+"""
+Module with the places inputi/inputs can read from. Pass one to the interpreter as inp
+(instead of a list of strings) to stream input rather than supplying it all up front.
+Every source hands out one line at a time, without its line ending, and None once it runs out.
+"""
+
+import mmap
+import os
+
+
+class InputSource:
+    """
+    Base class for input sources.
+    """
+
+    def read_line(self):
+        """Get the next line of input as a string, or None at the end of the input."""
+        return None
+
+    def read_int(self):
+        """Get the next line of input as an int (fails like int(None) at the end of the input)."""
+        return int(self.read_line())
+
+
+class IterSource(InputSource):
+    """
+    Reads lines from any iterable, e.g. a generator producing input on demand.
+    """
+
+    def __init__(self, iterable):
+        self.iterator = iter(iterable)
+
+    def read_line(self):
+        line = next(self.iterator, None)
+        if line is None:
+            return None
+        return str(line)
+
+    def read_int(self):
+        return int(next(self.iterator, None))
+
+
+class FileSource(InputSource):
+    """
+    Reads lines from a file descriptor (or an object with fileno(), like sys.stdin), fetching
+    chunk_size bytes per read instead of a syscall per line.
+    """
+
+    def __init__(self, fd, chunk_size=1 << 16, encoding="utf-8"):
+        self.file = None
+        if not isinstance(fd, int):
+            self.file = fd  # hold on to the file object so it isn't closed underneath us
+            fd = fd.fileno()
+        self.fd = fd
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.lines = []  # complete lines from the chunks read so far
+        self.next_line = 0  # index of the next line in self.lines to hand out
+        self.partial_line = b""  # start of a line whose end hasn't been read yet
+        self.at_eof = False
+
+    def read_line(self):
+        line = self.__read_raw_line()
+        if line is None:
+            return None
+        return line.decode(self.encoding).rstrip("\r")
+
+    def read_int(self):
+        # int() parses bytes (and ignores the surrounding whitespace, including \r) directly
+        return int(self.__read_raw_line())
+
+    def __read_raw_line(self):
+        while self.next_line == len(self.lines):
+            if self.at_eof:
+                return None
+            self.__read_chunk()
+        line = self.lines[self.next_line]
+        self.next_line += 1
+        return line
+
+    def __read_chunk(self):
+        chunk = os.read(self.fd, self.chunk_size)
+        if not chunk:
+            self.at_eof = True
+            # the input may not end with a newline
+            self.lines = [self.partial_line] if self.partial_line else []
+            self.partial_line = b""
+        else:
+            self.lines = (self.partial_line + chunk).split(b"\n")
+            self.partial_line = self.lines.pop()
+        self.next_line = 0
+
+
+class MmapSource(InputSource):
+    """
+    Reads lines from a file by memory-mapping it, so large input files are split into lines
+    without being read into memory first.
+    """
+
+    def __init__(self, path, encoding="utf-8"):
+        self.encoding = encoding
+        with open(path, "rb") as f:
+            self.size = os.fstat(f.fileno()).st_size
+            # an empty file can't be mapped, but there's nothing to read from it anyway
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def read_line(self):
+        line = self.__read_raw_line()
+        if line is None:
+            return None
+        return line.decode(self.encoding).rstrip("\r")
+
+    def read_int(self):
+        return int(self.__read_raw_line())
+
+    def close(self):
+        """Unmap the file."""
+        if self.data is not None:
+            self.data.close()
+
+    def __read_raw_line(self):
+        if self.data is None:
+            return None
+        line = self.data.readline()
+        if not line:
+            return None
+        if line[-1:] == b"\n":
+            return line[:-1]
+        return line
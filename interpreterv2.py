@@ -4,19 +4,26 @@ delegating functionality to various modules.
 """
 
 from classv2 import ClassDef
+from brewin_exception import BrewinException, report_uncaught
 from intbase import InterpreterBase, ErrorType
+from interpreter_io import InterpreterIO
 from bparser import BParser
 from objectv2 import ObjectDef
+from tracer import Tracer
 
 
-class Interpreter(InterpreterBase):
+class Interpreter(InterpreterIO):
     """
-    Main interpreter class that subclasses InterpreterBase.
+    Main interpreter class that subclasses InterpreterIO (an InterpreterBase, see interpreter_io.py).
     """
 
-    def __init__(self, console_output=True, inp=None, trace_output=False):
-        super().__init__(console_output, inp)
+    def __init__(self, console_output=True, inp=None, trace_output=False,
+                 output_sink=None, keep_output_log=True):
+        super().__init__(console_output, inp, output_sink, keep_output_log)
         self.trace_output = trace_output
+        # trace_output can be True or a Tracer (see tracer.py) to record the statements executed into
+        # a ring buffer, which is dumped if the program fails
+        self.tracer = Tracer() if trace_output is True else (trace_output or None)
         self.main_object = None
         self.class_index = {}
 
@@ -39,9 +46,19 @@ class Interpreter(InterpreterBase):
         )
 
         # call main function in main class; return value is ignored from main
-        self.main_object.call_method(
-            InterpreterBase.MAIN_FUNC_DEF, False, [], invalid_line_num_of_caller
-        )
+        try:
+            try:
+                self.main_object.call_method(
+                    InterpreterBase.MAIN_FUNC_DEF, False, [], invalid_line_num_of_caller
+                )
+            except BrewinException as exception:
+                report_uncaught(self, exception)
+        except Exception as error:
+            if self.tracer is not None:
+                self.tracer.report_error(error)
+            raise
+        finally:
+            self.flush_output()  # also push out whatever was printed before an error
 
         # program terminates!
 
@@ -66,7 +83,7 @@ class Interpreter(InterpreterBase):
             )
         class_def = self.class_index[class_name]
         obj = ObjectDef(
-            self, class_def, self.trace_output
+            self, class_def, self.tracer
         )  # Create an object based on this class definition
         return obj
 
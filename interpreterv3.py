@@ -1,27 +1,148 @@
-from classv2 import ClassDef
+import contextlib
+import gc
+import sys
+import threading
+import time
+from classv3 import ClassDef
+from env_v3 import FramePool
+from brewin_exception import BrewinException, report_uncaught
 from intbase import InterpreterBase, ErrorType
+from interpreter_io import InterpreterIO
 from bparser import BParser
-from objectv2 import ObjectDef
-from type_valuev2 import TypeManager
+from objectv3 import ObjectDef
+from heap import HeapTracker
+from input_source import InputSource
+from profiler import Profiler
+from runtime_stats import CountingObjectDef, RuntimeStats
+from sampling_profiler import SamplingProfiler
+from tracer import Tracer
+from type_valuev3 import TypeManager
 
 # need to document that each class has at least one method guaranteed
 
+# the collector is switched off for as long as at least one interpreter (in any thread) is running with
+# cyclic_gc=False, and back on when the last of them finishes, unless something else had it off already
+_gc_lock = threading.Lock()
+_gc_pause_count = 0
+_gc_was_enabled = False
+
+
+@contextlib.contextmanager
+def cyclic_gc_paused():
+    global _gc_pause_count, _gc_was_enabled
+    with _gc_lock:
+        if _gc_pause_count == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pause_count += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pause_count -= 1
+            if _gc_pause_count == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+# how many steps a run with a time limit takes between looks at the clock
+LIMIT_CHECK_INTERVAL = 1000
+
+
+# raised when a run goes over the step budget or the time limit it was given (see Interpreter); these aren't
+# errors in the program, so they have no ErrorType, but error_line is set to where the run was stopped
+class ExecutionLimitExceeded(RuntimeError):
+    pass
+
+
+class StepLimitExceeded(ExecutionLimitExceeded):
+    pass
+
+
+class TimeLimitExceeded(ExecutionLimitExceeded):
+    pass
+
+
+# a program parsed and loaded by Interpreter.load(): its types, its classes, and its method bodies with their
+# statement handlers bound. nothing in it changes while it runs, so it can be run again and again, by the
+# interpreter that loaded it or (unless it was loaded with tracing or profiling, whose hooks are bound into the
+# method bodies) by any other, including by interpreters in other threads at the same time: all of a run's state
+# (output, input position, frames, objects) belongs to the interpreter running it
+class LoadedProgram:
+    def __init__(self, type_manager, class_index, instrumented_by=None):
+        self.type_manager = type_manager
+        self.class_index = class_index
+        self.instrumented_by = instrumented_by  # the interpreter whose tracer and profilers are bound in, if any
+        self.async_ready = False  # set by AsyncInterpreter.load() (see async_runtime.py)
+
 # Main interpreter class
-class Interpreter(InterpreterBase):
-    def __init__(self, console_output=True, inp=None, trace_output=False):
-        super().__init__(console_output, inp)
+class Interpreter(InterpreterIO):
+    # brewin objects are freed by reference counting alone (unless the program itself builds a cycle, e.g. a
+    # doubly-linked list), so callers can pass cyclic_gc=False to turn off python's cyclic collector while
+    # the program runs and avoid its pauses in allocation-heavy programs
+    # with profile=True, per-method call counts and times and per-line execution counts are collected in
+    # self.profiler (see profiler.py); with a sampling_interval (in seconds), the brewin call stack is sampled
+    # into self.sampler (see sampling_profiler.py). without either, no profiling code runs at all
+    # with collect_stats=True, counts of the interpreter's own work are collected in self.stats (see
+    # runtime_stats.py), by instrumented versions of the classes and methods involved
+    # trace_output can be True or a Tracer (see tracer.py) to record the statements executed into a ring buffer,
+    # self.tracer, which is dumped if the program fails
+    # with track_heap=True, the live objects are tracked per class and allocation site in self.heap (see heap.py),
+    # which takes a snapshot when main returns; more can be taken during the run with self.heap.take_snapshot()
+    # with max_steps, a run that takes more steps (loop iterations and method calls) than that fails with
+    # StepLimitExceeded; with time_limit (in seconds), a run still going after that long fails with
+    # TimeLimitExceeded. both are only checked at steps, so a run waiting for input isn't stopped
+    def __init__(self, console_output=True, inp=None, trace_output=False, cyclic_gc=True,
+                 output_sink=None, keep_output_log=True, profile=False, sampling_interval=None,
+                 collect_stats=False, track_heap=False, max_steps=None, time_limit=None):
+        super().__init__(console_output, inp, output_sink, keep_output_log)
         self.trace_output = trace_output
+        self.tracer = Tracer() if trace_output is True else (trace_output or None)
+        self.profiler = Profiler() if profile else None
+        self.sampler = SamplingProfiler(sampling_interval) if sampling_interval else None
+        self.heap = HeapTracker() if track_heap else None
+        self.cyclic_gc = cyclic_gc
+        self.max_steps = max_steps
+        self.time_limit = time_limit
+        self.reset_limits()
+        if collect_stats:
+            self.stats = RuntimeStats()
+            self.object_class = CountingObjectDef
+            self.frame_pool = FramePool(self.stats.new_frame)
+            self.check_type_compatibility = self.stats.count_type_checks(self.check_type_compatibility)
+        else:
+            self.stats = None
+            self.object_class = ObjectDef
+            self.frame_pool = FramePool()  # recycles method call frames
 
-    # run a program, provided in an array of strings, one string per line of source code
+    # run a program, provided in an array of strings, one string per line of source code, or as a LoadedProgram
     # usese the provided BParser class found in parser.py to parse the program into lists
     def run(self, program):
-        status, parsed_program = BParser.parse(program)
-        if not status:
-            super().error(
-                ErrorType.SYNTAX_ERROR, f"Parse error on program: {parsed_program}"
+        if self.cyclic_gc:
+            self.__run_sampled(program)
+            return
+        with cyclic_gc_paused():
+            self.__run_sampled(program)
+
+    def __run_sampled(self, program):
+        if self.sampler is None:
+            self.__run(program)
+            return
+        self.sampler.start()
+        try:
+            self.__run(program)
+        finally:
+            self.sampler.stop()
+
+    def __run(self, program):
+        if not isinstance(program, LoadedProgram):
+            program = self.load(program)
+        elif program.instrumented_by is not (self if self.__is_instrumented() else None):
+            raise ValueError(
+                "the program's tracing and profiling hooks don't match this interpreter's; load it with this interpreter"
             )
-        self.__add_all_class_types_to_type_manager(parsed_program)
-        self.__map_class_names_to_class_defs(parsed_program)
+        self.type_manager = program.type_manager
+        self.class_index = program.class_index
+        self.reset_limits()
 
         # instantiate main class
         invalid_line_num_of_caller = None
@@ -30,12 +151,78 @@ class Interpreter(InterpreterBase):
         )
 
         # call main function in main class; return value is ignored from main
-        self.main_object.call_method(
-            InterpreterBase.MAIN_FUNC_DEF, [], False, invalid_line_num_of_caller
-        )
+        try:
+            try:
+                self.main_object.call_method(
+                    InterpreterBase.MAIN_FUNC_DEF, [], False, invalid_line_num_of_caller
+                )
+            except BrewinException as exception:
+                report_uncaught(self, exception)
+            if self.heap is not None:
+                self.heap.take_snapshot("end")
+        except Exception as error:
+            if self.tracer is not None:
+                self.tracer.report_error(error)
+            raise
+        finally:
+            self.flush_output()  # also push out whatever was printed before an error
 
         # program terminates!
 
+    # parses and loads a program (an array of strings, one per line) without running it, and returns it as a
+    # LoadedProgram that run() can execute any number of times, e.g. with different inputs
+    def load(self, program):
+        status, parsed_program = BParser.parse(program)
+        if not status:
+            super().error(
+                ErrorType.SYNTAX_ERROR, f"Parse error on program: {parsed_program}"
+            )
+        self.__add_all_class_types_to_type_manager(parsed_program)
+        self.__map_class_names_to_class_defs(parsed_program)
+        return LoadedProgram(
+            self.type_manager, self.class_index, self if self.__is_instrumented() else None
+        )
+
+    # clears what the last run left behind (output, input position, error, main object) but nothing that was
+    # loaded, so the interpreter can run a LoadedProgram again; inp, if given, replaces the input
+    def reset(self, inp=None):
+        super().reset()
+        self.main_object = None
+        if inp is not None:
+            self.inp = inp
+            self.input_source = inp if isinstance(inp, InputSource) else None
+
+    # starts the step budget and the time limit over, for a new run. every step counts steps_until_check
+    # down, and check_limits() is only called when it gets to 0: with no limits, that's never
+    def reset_limits(self):
+        self.steps_taken = 0  # as of the last check
+        self.deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        self.steps_until_check = self.steps_between_checks = self.__steps_to_next_check()
+
+    # called by the step that counted steps_until_check down to 0
+    def check_limits(self, line_num):
+        self.steps_taken += self.steps_between_checks
+        if self.max_steps is not None and self.steps_taken > self.max_steps:
+            self.__stop_run(StepLimitExceeded, f"step limit of {self.max_steps} exceeded", line_num)
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            self.__stop_run(TimeLimitExceeded, f"time limit of {self.time_limit}s exceeded", line_num)
+        self.steps_until_check = self.steps_between_checks = self.__steps_to_next_check()
+
+    def __steps_to_next_check(self):
+        steps = sys.maxsize if self.deadline is None else LIMIT_CHECK_INTERVAL
+        if self.max_steps is not None:
+            steps = min(steps, self.max_steps - self.steps_taken + 1)  # the step after the last one allowed
+        return steps
+
+    def __stop_run(self, exception_class, description, line_num):
+        self.error_line = line_num
+        if line_num:
+            raise exception_class(f"{description} on line {line_num}")
+        raise exception_class(description)
+
+    def __is_instrumented(self):
+        return self.tracer is not None or self.profiler is not None or self.sampler is not None
+
     # user passes in the line number of the statement that performed the new command so we can generate an error
     # if the user tries to new an class name that does not exist. This will report the line number of the statement
     # with the new command
@@ -47,9 +234,11 @@ class Interpreter(InterpreterBase):
                 line_num_of_statement,
             )
         class_def = self.class_index[class_name]
-        obj = ObjectDef(
-            self, class_def, None, self.trace_output
+        obj = self.object_class(
+            self, class_def
         )  # Create an object based on this class definition
+        if self.heap is not None:
+            self.heap.track(obj, line_num_of_statement)
         return obj
 
     # returns a ClassDef object
@@ -87,6 +276,32 @@ class Interpreter(InterpreterBase):
                         item[0].line_num,
                     )
                 self.class_index[item[1]] = ClassDef(item, self)
+        profilers = [p for p in (self.profiler, self.sampler) if p is not None]
+        tracer = self.tracer
+        for class_def in self.class_index.values():
+            for method_def in class_def.get_methods():
+                code = method_def.code
+                wrap = None
+                if profilers or tracer is not None:
+                    wrap = self.__statement_wrapper(profilers, tracer, class_def.name, method_def.method_name)
+                ObjectDef.bind_statement_handlers(code, wrap)
+                if profilers and isinstance(code, list) and code:
+                    # the method body's statement stands for the call of the method
+                    key = (class_def.name, method_def.line_num, method_def.method_name)
+                    for profiler in profilers:
+                        code[0].handler = profiler.wrap_method(code[0].handler, key)
+
+    # returns the function that wraps the statement handlers of one method for the profilers and the tracer
+    @staticmethod
+    def __statement_wrapper(profilers, tracer, class_name, method_name):
+        def wrap(handler, tok):
+            for profiler in profilers:
+                handler = profiler.wrap_statement(handler)
+            if tracer is not None:
+                handler = tracer.wrap_statement(handler, tok, class_name, method_name)
+            return handler
+
+        return wrap
 
     # [class classname inherits superclassname [items]]
     def __add_all_class_types_to_type_manager(self, parsed_program):
@@ -4,10 +4,38 @@ of the code to execute various instructions.
 """
 
 from env_v2 import EnvironmentManager
+from brewin_exception import BrewinException
 from intbase import InterpreterBase, ErrorType
 from type_valuev2 import create_value
 from type_valuev2 import Type, Value
-from copy import deepcopy
+from string_rope import concat, flatten
+
+
+class FieldView:
+    """
+    The fields of an object as seen by the methods of one of its superclasses: only the fields that
+    class has, read from and written to the object's own field map, so every method of the object
+    sees the current values. Lookups take constant time.
+    """
+
+    __slots__ = ("fields", "names")
+
+    def __init__(self, fields, names):
+        self.fields = fields
+        self.names = names
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __getitem__(self, name):
+        if name not in self.names:
+            raise KeyError(name)
+        return self.fields[name]
+
+    def __setitem__(self, name, value):
+        if name not in self.names:
+            raise KeyError(name)
+        self.fields[name] = value
 
 
 class ObjectDef:
@@ -17,10 +45,10 @@ class ObjectDef:
     STATUS_TYPE_ERROR = 3
     STATUS_RETURN_DEFAULT = 4
 
-    def __init__(self, interpreter, class_def, trace_output):
+    def __init__(self, interpreter, class_def, tracer):
         self.interpreter = interpreter  # objref to interpreter object. used to report errors, get input, produce output
         self.class_def = class_def  # take class body from 3rd+ list elements, e.g., ["class",classname", [classbody]]
-        self.trace_output = trace_output
+        self.tracer = tracer  # a Tracer, or None when not tracing
         self.__map_fields_to_values()
         self.__map_method_names_to_method_definitions()
         self.__create_map_of_operations_to_lambdas()  # sets up maps to facilitate binary and unary operations, e.g., (+ 5 6)
@@ -29,29 +57,21 @@ class ObjectDef:
         class_def = self.class_def
         if calling_super:
             class_def = class_def.parent_class
-        while class_def.parent_class is not None and \
-                method_name not in [x.method_name for x in class_def.get_methods()]:
-            class_def = class_def.parent_class
+        class_def, method = class_def.find_method(method_name)
 
-        if method_name not in [x.method_name for x in class_def.get_methods()]:
+        if method is None:
             self.interpreter.error(
                 ErrorType.NAME_ERROR,
                 "unknown method " + method_name,
                 line_num_of_caller,
             )
-        method = None
-        for x in class_def.get_methods():
-            if x.method_name == method_name:
-                method = x
         return class_def, method
 
+    # class_def is this object's class or one of its superclasses
     def get_fields_by_class(self, class_def):
-        c = self.class_def
-        while c is not class_def and c.parent_class is not None:
-            c = c.parent_class
-        field_names = [x.field_name for x in c.get_fields()]
-        #print(self.fields, field_names)
-        return {x:self.fields[x] for x in field_names}
+        if class_def is self.class_def:
+            return self.fields  # the object's own class sees every field
+        return FieldView(self.fields, class_def.field_names)
 
     def name_is_parent_class_of(self, parent_name, child_name):
         parent = self.interpreter.class_index[parent_name]
@@ -106,7 +126,15 @@ class ObjectDef:
         
         #print(env.environment)
         # since each method has a single top-level statement, execute it.
-        status, return_value = self.__execute_statement(env, fields, method_info.code)
+        tracer = self.tracer
+        if tracer is None:
+            status, return_value = self.__execute_statement(env, fields, method_info.code)
+        else:
+            tracer.enter_method(class_def.name, method_name)
+            try:
+                status, return_value = self.__execute_statement(env, fields, method_info.code)
+            finally:
+                tracer.leave_method()  # also when a throw or an error leaves the method
         # if the method explicitly used the (return expression) statement to return a value, then return that
         # value back to the caller
 
@@ -142,8 +170,8 @@ class ObjectDef:
         - return_value is a Value containing the returned value from the function
         """
         #print(env)
-        if self.trace_output:
-            print(f"{code[0].line_num}: {code}")
+        if self.tracer is not None:
+            self.tracer.record_statement(code[0].line_num, code[0])
         tok = code[0]
         if tok == InterpreterBase.BEGIN_DEF:
             return self.__execute_begin(env, fields, code)
@@ -165,6 +193,10 @@ class ObjectDef:
             return self.__execute_print(env, fields, code)
         if tok == InterpreterBase.LET_DEF:
             return self.__execute_let(env, fields, code)
+        if tok == InterpreterBase.TRY_DEF:
+            return self.__execute_try(env, fields, code)
+        if tok == InterpreterBase.THROW_DEF:
+            return self.__execute_throw(env, fields, code)
 
         self.interpreter.error(
             ErrorType.SYNTAX_ERROR, "unknown statement " + tok, tok.line_num
@@ -211,7 +243,7 @@ class ObjectDef:
 
     # (print expression1 expression2 ...) where expresion could be a variable, value, or a (+ ...)
     def __execute_print(self, env, fields, code):
-        output = ""
+        output = []
         #print(env.environment)
         for expr in code[1:]:
             # TESTING NOTE: Will not test printing of object references
@@ -221,21 +253,44 @@ class ObjectDef:
             if typ == Type.BOOL:
                 val = "true" if val else "false"
             # document - will never print out an object ref
-            output += str(val)
-        self.interpreter.output(output)
+            output.append(str(val))
+        self.interpreter.output("".join(output))
         return ObjectDef.STATUS_PROCEED, None
 
     # (inputs target_variable) or (inputi target_variable) sets target_variable to input string/int
     def __execute_input(self, env, fields, code, get_string):
-        inp = self.interpreter.get_input()
         if get_string:
-            val = Value(Type.STRING, inp)
+            val = Value(Type.STRING, self.interpreter.get_input())
         else:
-            val = Value(Type.INT, int(inp))
+            val = Value(Type.INT, self.interpreter.get_input_int())
 
         self.__set_variable_aux(env, fields, code[1], val, code[0].line_num)
         return ObjectDef.STATUS_PROCEED, None
 
+    # (try statement catch_statement) runs catch_statement, with the thrown string in the variable exception,
+    # if statement or any method it calls throws; the throw unwinds to here as a python exception, so
+    # statements don't pass an extra status up while nothing is thrown
+    def __execute_try(self, env, fields, code):
+        try:
+            return self.__execute_statement(env, fields, code[1])
+        except BrewinException as exception:
+            value = exception.value
+        env.block_nest()
+        try:
+            env.create_new_symbol(InterpreterBase.EXCEPTION_VARIABLE_DEF, Value(Type.STRING, value))
+            return self.__execute_statement(env, fields, code[2])
+        finally:
+            env.block_unnest()
+
+    # (throw expression) where expression must evaluate to a string
+    def __execute_throw(self, env, fields, code):
+        result = self.__evaluate_expression(env, fields, code[1], code[0].line_num)
+        if result.type() != Type.STRING:
+            self.interpreter.error(
+                ErrorType.TYPE_ERROR, "throw of a non-string value", code[0].line_num
+            )
+        raise BrewinException(result.value(), code[0].line_num)
+
     # helper method used to set either parameter variables or member fields; parameters currently shadow
     # member fields
     def __set_variable_aux(self, env, fields, var_name, value, line_num, is_let=False):
@@ -249,7 +304,7 @@ class ObjectDef:
         
         # let shadows everything else
         if is_let:
-            env.set(var_name, value)
+            env.create_new_symbol(var_name, value)
             return
 
         param_val = env.get(var_name)
@@ -279,8 +334,7 @@ class ObjectDef:
         #        self.interpreter.error(
         #            ErrorType.TYPE_ERROR, "incompatible classes", line_num
         #        )
-        fields[var_name] = value
-        self.fields[var_name] = value
+        fields[var_name] = value  # fields is self.fields or a view of it
 
     # (if expression (statement) (statement) ) where expresion could be a boolean constant (e.g., true), member
     # variable without ()s, or a boolean expression in parens, like (> 5 a)
@@ -459,9 +513,15 @@ class ObjectDef:
         return obj.call_method(code[2], calling_super, actual_args, line_num_of_statement)
 
     def __execute_let(self, env, fields, code):
-
-        env_let = deepcopy(env)
-
+        # the let's variables live in a nested block of the method's environment, which is discarded
+        # when the let ends; assignments to enclosing variables inside the let are kept
+        env.block_nest()
+        try:
+            return self.__execute_let_block(env, fields, code)
+        finally:
+            env.block_unnest()
+
+    def __execute_let_block(self, env, fields, code):
         var_set = set()
         var_list = []
 
@@ -487,9 +547,9 @@ class ObjectDef:
                     ErrorType.NAME_ERROR, "cannot have 2 of the same variable in let statement", code[0].line_num
                 )
 
-            self.__set_variable_aux(env_let, fields, var[1], val, code[0].line_num, True)
+            self.__set_variable_aux(env, fields, var[1], val, code[0].line_num, True)
         for statement in code[2:]:
-            status, return_value = self.__execute_statement(env_let, fields, statement)
+            status, return_value = self.__execute_statement(env, fields, statement)
             if status == ObjectDef.STATUS_RETURN or status == ObjectDef.STATUS_RETURN_DEFAULT:
                 return (
                     status,
@@ -543,13 +603,13 @@ class ObjectDef:
             "<=": lambda a, b: Value(Type.BOOL, a.value() <= b.value()),
         }
         self.binary_ops[Type.STRING] = {
-            "+": lambda a, b: Value(Type.STRING, a.value() + b.value()),
-            "==": lambda a, b: Value(Type.BOOL, a.value() == b.value()),
-            "!=": lambda a, b: Value(Type.BOOL, a.value() != b.value()),
-            ">": lambda a, b: Value(Type.BOOL, a.value() > b.value()),
-            "<": lambda a, b: Value(Type.BOOL, a.value() < b.value()),
-            ">=": lambda a, b: Value(Type.BOOL, a.value() >= b.value()),
-            "<=": lambda a, b: Value(Type.BOOL, a.value() <= b.value()),
+            "+": lambda a, b: Value(Type.STRING, concat(a.value(), b.value())),  # lazy, see string_rope.py
+            "==": lambda a, b: Value(Type.BOOL, flatten(a.value()) == flatten(b.value())),
+            "!=": lambda a, b: Value(Type.BOOL, flatten(a.value()) != flatten(b.value())),
+            ">": lambda a, b: Value(Type.BOOL, flatten(a.value()) > flatten(b.value())),
+            "<": lambda a, b: Value(Type.BOOL, flatten(a.value()) < flatten(b.value())),
+            ">=": lambda a, b: Value(Type.BOOL, flatten(a.value()) >= flatten(b.value())),
+            "<=": lambda a, b: Value(Type.BOOL, flatten(a.value()) <= flatten(b.value())),
         }
         self.binary_ops[Type.BOOL] = {
             "&": lambda a, b: Value(Type.BOOL, a.value() and b.value()),
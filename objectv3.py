@@ -1,37 +1,95 @@
-from classv2 import VariableDef
-import copy
-from env_v2 import EnvironmentManager
+import weakref
+from brewin_exception import BrewinException
 from intbase import InterpreterBase, ErrorType
-from type_valuev2 import create_value, create_default_value
-from type_valuev2 import Type, Value
+from type_valuev3 import create_value, create_default_value
+from type_valuev3 import Type, Value
+from string_rope import concat, flatten
 
 
 class ObjectDef:
-    # statement execution results
-    STATUS_PROCEED = 0
-    STATUS_RETURN = 1
-
     # type constants
     INT_TYPE_CONST = Type(InterpreterBase.INT_DEF)
     STRING_TYPE_CONST = Type(InterpreterBase.STRING_DEF)
     BOOL_TYPE_CONST = Type(InterpreterBase.BOOL_DEF)
 
+    # the operators of binary and unary operations, e.g., (+ 5 6), with what they do for each operand type; built
+    # once for the class rather than for every object
+    BINARY_OP_LIST = [
+        "+",
+        "-",
+        "*",
+        "/",
+        "%",
+        "==",
+        "!=",
+        "<",
+        "<=",
+        ">",
+        ">=",
+        "&",
+        "|",
+    ]
+    UNARY_OP_LIST = ["!"]
+    BINARY_OPS = {}
+    BINARY_OPS[InterpreterBase.INT_DEF] = {
+        "+": lambda a, b: Value(ObjectDef.INT_TYPE_CONST, a.value() + b.value()),
+        "-": lambda a, b: Value(ObjectDef.INT_TYPE_CONST, a.value() - b.value()),
+        "*": lambda a, b: Value(ObjectDef.INT_TYPE_CONST, a.value() * b.value()),
+        "/": lambda a, b: Value(
+            ObjectDef.INT_TYPE_CONST, a.value() // b.value()
+        ),  # // for integer ops
+        "%": lambda a, b: Value(ObjectDef.INT_TYPE_CONST, a.value() % b.value()),
+        "==": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() == b.value()),
+        "!=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() != b.value()),
+        ">": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() > b.value()),
+        "<": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() < b.value()),
+        ">=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() >= b.value()),
+        "<=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() <= b.value()),
+    }
+    BINARY_OPS[InterpreterBase.STRING_DEF] = {
+        "+": lambda a, b: Value(ObjectDef.STRING_TYPE_CONST, concat(a.value(), b.value())),  # lazy, see string_rope.py
+        "==": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, flatten(a.value()) == flatten(b.value())),
+        "!=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, flatten(a.value()) != flatten(b.value())),
+        ">": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, flatten(a.value()) > flatten(b.value())),
+        "<": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, flatten(a.value()) < flatten(b.value())),
+        ">=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, flatten(a.value()) >= flatten(b.value())),
+        "<=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, flatten(a.value()) <= flatten(b.value())),
+    }
+    BINARY_OPS[InterpreterBase.BOOL_DEF] = {
+        "&": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() and b.value()),
+        "|": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() or b.value()),
+        "==": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() == b.value()),
+        "!=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() != b.value()),
+    }
+    BINARY_OPS[InterpreterBase.CLASS_DEF] = {
+        "==": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() == b.value()),
+        "!=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() != b.value()),
+    }
+
+    UNARY_OPS = {}
+    UNARY_OPS[InterpreterBase.BOOL_DEF] = {
+        "!": lambda a: Value(ObjectDef.BOOL_TYPE_CONST, not a.value()),
+    }
+
     # class_def is a ClassDef object
-    def __init__(self, interpreter, class_def, anchor_object=None, trace_output=False):
+    def __init__(self, interpreter, class_def, anchor_object=None):
         self.interpreter = interpreter  # objref to interpreter object. used to report errors, get input, produce output
         self.class_def = class_def
 
+        # superclass parts only hold a weak reference back to the anchor (the most derived part) and the anchor
+        # holds none to itself, so objects never form reference cycles and are freed as soon as they're unreachable
         if anchor_object is None:
-            self.anchor_object = self
+            self.anchor_ref = None
         else:
-            self.anchor_object = anchor_object
-        self.trace_output = trace_output
+            self.anchor_ref = weakref.ref(anchor_object)
         self.__instantiate_fields()
         self.__map_method_names_to_method_definitions()
-        self.__create_map_of_operations_to_lambdas()  # sets up maps to facilitate binary and unary operations, e.g., (+ 5 6)
         self.__init_superclass_if_any()  # construct default values for superclass fields all the way to the base class
 
-    def __get_obj_with_method(self, start_obj, method_name, actual_params):
+    # _get_obj_with_method(), _execute_statement(), and _evaluate_expression() are the hook points for subclasses that
+    # watch a run (e.g., CountingObjectDef in runtime_stats.py): every method lookup, statement, and expression of the
+    # run goes through them
+    def _get_obj_with_method(self, start_obj, method_name, actual_params):
         cur_obj = start_obj
         while cur_obj is not None:
             if method_name not in cur_obj.methods:
@@ -53,8 +111,33 @@ class ObjectDef:
     # the caller passes in its line number so if there's an error (e.g., mismatched # of parameters or unknown
     # method name) we can generate an error at the source (where the call is initiated) for better context
     def call_method(self, method_name, actual_params, super_only, line_num_of_caller):
+        # every call is a step of the run's step budget (see Interpreter.check_limits())
+        interpreter = self.interpreter
+        interpreter.steps_until_check -= 1
+        if interpreter.steps_until_check <= 0:
+            interpreter.check_limits(line_num_of_caller)
+
+        obj_to_call_on, method_def = self._find_method(method_name, actual_params, super_only, line_num_of_caller)
+        frame_pool = interpreter.frame_pool
+        env = self._enter_method(method_def, actual_params)
+        # since each method has a single top-level statement, execute it.
+        try:
+            return_value = obj_to_call_on._execute_statement(
+                env, method_def.return_type, method_def.code
+            )
+        finally:
+            frame_pool.release(env)
+        # if the method executed a (return ...) statement, then return that value back to the caller
+        if return_value is not None:
+            return return_value
+        # The method didn't explicitly return a value, so return the default return type for the method
+        return self._default_return_value(method_def)
+
+    # the parts of a method call shared with the asyncio runtime's version of call_method()
+    # returns the object part whose method a call runs, and the MethodDef of that method
+    def _find_method(self, method_name, actual_params, super_only, line_num_of_caller):
         # check to see if we have a method in this class or its base class(es) matching this signature
-        if self.__get_obj_with_method(self, method_name, actual_params) is None:
+        if self._get_obj_with_method(self, method_name, actual_params) is None:
             self.interpreter.error(
                 ErrorType.NAME_ERROR,
                 "unknown method " + method_name,
@@ -68,41 +151,38 @@ class ObjectDef:
         if super_only:
             anchor = self
         else:
-            anchor = self.anchor_object
-        obj_to_call_on = self.__get_obj_with_method(anchor, method_name, actual_params)
-
-        method_def = obj_to_call_on.methods[method_name]
-
-        # handle the call in the object
-        env = (
-            EnvironmentManager()
-        )  # maintains lexical environment for function; just params for now
+            anchor = self.get_anchor_object()
+        obj_to_call_on = self._get_obj_with_method(anchor, method_name, actual_params)
+        return obj_to_call_on, obj_to_call_on.methods[method_name]
+
+    # the frame holds the lexical environment for the method: params, plus locals of let blocks; the caller
+    # releases it to the interpreter's frame pool when the method returns
+    def _enter_method(self, method_def, actual_params):
+        env = self.interpreter.frame_pool.acquire(method_def.frame_size)
         for formal, actual in zip(method_def.formal_params, actual_params):
-            formal_copy = copy.copy(formal)  # VariableDef obj.
-            formal_copy.set_value(actual)  # actual is a Value obj.
-            if not env.create_new_symbol(formal_copy.name):
+            # actual is a Value obj.
+            if not env.create_new_symbol(formal.name, formal.type, actual):
                 self.interpreter.error(
                     ErrorType.NAME_ERROR,
                     "duplicate formal param name " + formal.name,
                     method_def.line_num,
                 )
-            env.set(formal_copy.name, formal_copy)
-        # since each method has a single top-level statement, execute it.
-        status, return_value = obj_to_call_on.__execute_statement(
-            env, method_def.return_type, method_def.code
-        )
-        # if the method explicitly used the (return expression) statement to return a value, then return that
-        # value back to the caller
-        if status == ObjectDef.STATUS_RETURN and return_value is not None:
-            return return_value
-        # The method didn't explicitly return a value, so return the default return type for the method
+        return env
+
+    def _default_return_value(self, method_def):
         return create_default_value(method_def.get_return_type())
 
     # def get_me_as_value(self):
     #     return Value(Type(self.class_def.name), self)
 
+    # returns the most derived part of this object
+    def get_anchor_object(self):
+        if self.anchor_ref is None:
+            return self
+        return self.anchor_ref()
+
     def get_me_as_value(self):
-        anchor = self.anchor_object
+        anchor = self.get_anchor_object()
         return Value(Type(anchor.class_def.name), anchor)
 
     # checks whether each formal parameter has a compatible type with the actual parameter
@@ -114,40 +194,21 @@ class ObjectDef:
                 return False
         return True
 
-    # returns (status_code, return_value) where:
-    # - status_code indicates whether the statement (or one of its sub-statements) executed a return command and thus
-    #   the current method needs to terminate immediately, or whether the statement simply ran but didn't execute a
-    #   return statement, and thus the next statement in the method should run normally
-    # - return value is a value of type Value which is the returned value from the function
-    def __execute_statement(self, env, return_type, code):
-        if self.trace_output:
-            print(f"{code[0].line_num}: {code}")
+    # returns None if the statement simply ran and the next statement in the method should run normally, or,
+    # if the statement (or one of its sub-statements) executed a return command and thus the current method
+    # needs to terminate immediately, the Value returned from the function. Statements that contain other
+    # statements must pass a non-None result straight up to their caller.
+    # every statement's keyword token was tagged with the method that executes it by bind_statement_handlers()
+    # when the program was loaded, so there's nothing left to decide here
+    def _execute_statement(self, env, return_type, code):
+        return code[0].handler(self, env, return_type, code)
+
+    # statements that aren't in the handler table report an error when (and only if) they're executed
+    def __execute_unknown_statement(self, env, return_type, code):
         tok = code[0]
-        if tok == InterpreterBase.BEGIN_DEF:
-            return self.__execute_begin(env, return_type, code)
-        elif tok == InterpreterBase.SET_DEF:
-            return self.__execute_set(env, code)
-        elif tok == InterpreterBase.IF_DEF:
-            return self.__execute_if(env, return_type, code)
-        elif tok == InterpreterBase.CALL_DEF:
-            return self.__execute_call(env, code)
-        elif tok == InterpreterBase.WHILE_DEF:
-            return self.__execute_while(env, return_type, code)
-        elif tok == InterpreterBase.RETURN_DEF:
-            return self.__execute_return(env, return_type, code)
-        elif tok == InterpreterBase.INPUT_STRING_DEF:
-            return self.__execute_input(env, code, True)
-        elif tok == InterpreterBase.INPUT_INT_DEF:
-            return self.__execute_input(env, code, False)
-        elif tok == InterpreterBase.PRINT_DEF:
-            return self.__execute_print(env, code)
-        elif tok == InterpreterBase.LET_DEF:
-            return self.__execute_let(env, return_type, code)
-        else:
-            # Report error via interpreter
-            self.interpreter.error(
-                ErrorType.SYNTAX_ERROR, "unknown statement " + tok, tok.line_num
-            )
+        self.interpreter.error(
+            ErrorType.SYNTAX_ERROR, "unknown statement " + tok, tok.line_num
+        )
 
     # This method is used for both the begin and let statements
     # (begin (statement1) (statement2) ... (statementn))
@@ -156,24 +217,23 @@ class ObjectDef:
         if has_vardef: #handles the let case
             code_start = 2
             env.block_nest()
-            self.__add_locals_to_env(env, code[1], code[0].line_num)
+            self._add_locals_to_env(env, code[1], code[0].line_num)
         else: #handles the begin case
             code_start = 1
 
-        status = ObjectDef.STATUS_PROCEED
         return_value = None
         for statement in code[code_start:]:
-            status, return_value = self.__execute_statement(env, return_type, statement)
-            if status == ObjectDef.STATUS_RETURN:
+            return_value = self._execute_statement(env, return_type, statement)
+            if return_value is not None:
                 break
-        # if we run through the entire block without a return, then just return proceed
-        # we don't want the enclosing block to exit with a return
+        # if we run through the entire block without a return, then return_value is None and the
+        # enclosing block proceeds
         if has_vardef:
             env.block_unnest()
-        return status, return_value  # could be a valid return of a value or an error
+        return return_value
 
     # add all local variables defined in a let to the environment
-    def __add_locals_to_env(self, env, var_defs, line_number):
+    def _add_locals_to_env(self, env, var_defs, line_number):
         for var_def in var_defs:
             # vardef in the form of (typename varname defvalue)
             var_type = Type(var_def[0])
@@ -183,14 +243,12 @@ class ObjectDef:
             self.__check_type_compatibility(
                 var_type, default_value.type(), True, line_number
             )
-            if not env.create_new_symbol(var_name):
+            if not env.create_new_symbol(var_name, var_type, default_value):
                 self.interpreter.error(
                     ErrorType.NAME_ERROR,
                     "duplicate local variable name " + var_name,
                     line_number,
                 )
-            var_def = VariableDef(var_type, var_name, default_value)
-            env.set(var_name, var_def)
 
     # (let ((type1 var1 defval1) (type2 var2 defval2)) (statement1) (statement2) ...)
     # uses helper function __execute_begin to implement its functionality
@@ -200,41 +258,45 @@ class ObjectDef:
     # (call object_ref/me methodname param1 param2 param3)
     # where params are expressions, and expresion could be a value, or a (+ ...)
     # statement version of a method call; there's also an expression version of a method call below
-    def __execute_call(self, env, code):
-        return ObjectDef.STATUS_PROCEED, self.__execute_call_aux(
-            env, code, code[0].line_num
-        )
+    def __execute_call(self, env, return_type, code):
+        self.__execute_call_aux(env, code, code[0].line_num)
 
     # (set varname expression), where expression could be a value, or a (+ ...)
-    def __execute_set(self, env, code):
-        val = self.__evaluate_expression(env, code[2], code[0].line_num)
-        self.__set_variable_aux(
+    def __execute_set(self, env, return_type, code):
+        val = self._evaluate_expression(env, code[2], code[0].line_num)
+        self._set_variable_aux(
             env, code[1], val, code[0].line_num
         )  # checks/reports type and name errors
-        return ObjectDef.STATUS_PROCEED, None
 
     # (return expression) where expresion could be a value, or a (+ ...)
     def __execute_return(self, env, return_type, code):
         if len(code) == 1:
             # [return] with no return value; return default value for type
-            return ObjectDef.STATUS_RETURN, None
+            return create_default_value(return_type)
         else:
-            result = self.__evaluate_expression(env, code[1], code[0].line_num)
-            # CAREY FIX
-            if result.is_typeless_null():
-                self.__check_type_compatibility(return_type, result.type(), True, code[0].line_num) 
-                result = Value(return_type, None)  # propagate return type to null ###
-        self.__check_type_compatibility(
-            return_type, result.type(), True, code[0].line_num
-        )
-        return ObjectDef.STATUS_RETURN, result
+            result = self._evaluate_expression(env, code[1], code[0].line_num)
+        return self._check_return_value(return_type, result, code[0].line_num)
+
+    # checks a returned Value against the method's return type, giving a typeless null that type
+    def _check_return_value(self, return_type, result, line_num):
+        # CAREY FIX
+        if result.is_typeless_null():
+            self.__check_type_compatibility(return_type, result.type(), True, line_num)
+            result = Value(return_type, None)  # propagate return type to null ###
+        self.__check_type_compatibility(return_type, result.type(), True, line_num)
+        return result
 
     # (print expression1 expression2 ...) where expresion could be a variable, value, or a (+ ...)
-    def __execute_print(self, env, code):
-        output = ""
-        for expr in code[1:]:
+    def __execute_print(self, env, return_type, code):
+        self._print_values(
+            [self._evaluate_expression(env, expr, code[0].line_num) for expr in code[1:]]
+        )
+
+    # outputs the evaluated terms of a print statement as one line
+    def _print_values(self, terms):
+        output = []
+        for term in terms:
             # TESTING NOTE: Will not test printing of object references
-            term = self.__evaluate_expression(env, expr, code[0].line_num)
             val = term.value()
             typ = term.type()
             if typ == ObjectDef.BOOL_TYPE_CONST:
@@ -243,24 +305,22 @@ class ObjectDef:
                 else:
                     val = "false"
             # document will never print out an obj ref
-            output += str(val)
-        self.interpreter.output(output)
-        return ObjectDef.STATUS_PROCEED, None
-
-    # (inputs target_variable) or (inputi target_variable) sets target_variable to input string/int
-    def __execute_input(self, env, code, get_string):
-        inp = self.interpreter.get_input()
-        if get_string:
-            val = Value(ObjectDef.STRING_TYPE_CONST, inp)
-        else:
-            val = Value(ObjectDef.INT_TYPE_CONST, int(inp))
+            output.append(str(val))
+        self.interpreter.output("".join(output))
 
-        self.__set_variable_aux(env, code[1], val, code[0].line_num)
-        return ObjectDef.STATUS_PROCEED, None
+    # (inputs target_variable) sets target_variable to input string
+    def __execute_inputs(self, env, return_type, code):
+        val = Value(ObjectDef.STRING_TYPE_CONST, self.interpreter.get_input())
+        self._set_variable_aux(env, code[1], val, code[0].line_num)
+
+    # (inputi target_variable) sets target_variable to input int
+    def __execute_inputi(self, env, return_type, code):
+        val = Value(ObjectDef.INT_TYPE_CONST, self.interpreter.get_input_int())
+        self._set_variable_aux(env, code[1], val, code[0].line_num)
 
     # helper method used to set either parameter variables or member fields; parameters currently shadow
     # member fields
-    def __set_variable_aux(self, env, var_name, value, line_num):
+    def _set_variable_aux(self, env, var_name, value, line_num):
         # parameters shadows fields, locals shadow parameters (and outer-block locals)
         if self.__set_local_or_param(
             env, var_name, value, line_num
@@ -275,67 +335,105 @@ class ObjectDef:
     # (if expression (statement) (statement) ) where expresion could be a boolean constant (e.g., true), member
     # variable without ()s, or a boolean expression in parens, like (> 5 a)
     def __execute_if(self, env, return_type, code):
-        condition = self.__evaluate_expression(env, code[1], code[0].line_num)
+        condition = self._evaluate_expression(env, code[1], code[0].line_num)
         if condition.type() != ObjectDef.BOOL_TYPE_CONST:
-            self.interpreter.error(
-                ErrorType.TYPE_ERROR,
-                "non-boolean if condition " + ' '.join(x for x in code[1]),
-                code[0].line_num,
-            )
+            self._non_boolean_condition(code)
         if condition.value():
-            status, return_value = self.__execute_statement(
+            return self._execute_statement(
                 env, return_type, code[2]
             )  # if condition was true
-            return status, return_value
         elif len(code) == 4:
-            status, return_value = self.__execute_statement(
+            return self._execute_statement(
                 env, return_type, code[3]
             )  # if condition was false, do else
-            return status, return_value
-        else:
-            return ObjectDef.STATUS_PROCEED, None
+        return None
 
     # (while expression (statement) ) where expresion could be a boolean value, boolean member variable,
     # or a boolean expression in parens, like (> 5 a)
     def __execute_while(self, env, return_type, code):
+        interpreter = self.interpreter
         while True:
-            condition = self.__evaluate_expression(env, code[1], code[0].line_num)
+            # so is every iteration of a loop
+            interpreter.steps_until_check -= 1
+            if interpreter.steps_until_check <= 0:
+                interpreter.check_limits(code[0].line_num)
+            condition = self._evaluate_expression(env, code[1], code[0].line_num)
             if condition.type() != ObjectDef.BOOL_TYPE_CONST:
-                self.interpreter.error(
-                    ErrorType.TYPE_ERROR,
-                    "non-boolean while condition " + ' '.join(x for x in code[1]),
-                    code[0].line_num,
-                )
+                self._non_boolean_condition(code)
             if not condition.value():  # condition is false, exit loop immediately
-                return ObjectDef.STATUS_PROCEED, None
+                return None
             # condition is true, run body of while loop
-            status, return_value = self.__execute_statement(env, return_type, code[2])
-            if status == ObjectDef.STATUS_RETURN:
-                return (
-                    status,
-                    return_value,
-                )  # could be a valid return of a value or an error
+            return_value = self._execute_statement(env, return_type, code[2])
+            if return_value is not None:
+                return return_value
 
-    # var_def is a VariableDef
+    # reports the error for an if or while statement whose condition didn't evaluate to a bool
+    def _non_boolean_condition(self, code):
+        self.interpreter.error(
+            ErrorType.TYPE_ERROR,
+            f"non-boolean {code[0]} condition " + ' '.join(x for x in code[1]),
+            code[0].line_num,
+        )
+
+    # (try statement catch_statement): if statement, or any method it calls, throws, runs catch_statement with the
+    # thrown string in the variable exception. the throw is a python exception, so the try costs nothing when
+    # nothing is thrown: the statements inside it run exactly as they would outside one
+    def __execute_try(self, env, return_type, code):
+        blocks = len(env.blocks)
+        try:
+            return self._execute_statement(env, return_type, code[1])
+        except BrewinException as exception:
+            self._enter_catch(env, blocks, exception)
+        try:
+            return self._execute_statement(env, return_type, code[2])
+        finally:
+            env.block_unnest()
+
+    # sets env up for a catch statement: leaves the let blocks of this method that the throw skipped the end of
+    # (those nested deeper than blocks), then opens the catch's block, holding the variable exception; the caller
+    # closes it
+    def _enter_catch(self, env, blocks, exception):
+        while len(env.blocks) > blocks:
+            env.block_unnest()
+        env.block_nest()
+        env.create_new_symbol(
+            InterpreterBase.EXCEPTION_VARIABLE_DEF, ObjectDef.STRING_TYPE_CONST,
+            Value(ObjectDef.STRING_TYPE_CONST, exception.value)
+        )
+
+    # (throw expression) where expression must evaluate to a string
+    def __execute_throw(self, env, return_type, code):
+        self._throw(self._evaluate_expression(env, code[1], code[0].line_num), code[0].line_num)
+
+    # throws the evaluated expression of a throw statement
+    def _throw(self, result, line_num):
+        if result.type() != ObjectDef.STRING_TYPE_CONST:
+            self.interpreter.error(
+                ErrorType.TYPE_ERROR, "throw of a non-string value", line_num
+            )
+        raise BrewinException(result.value(), line_num)
+
+    # var_type is the Type of the variable and value is the Value it holds
     # this method checks to see if a variable holds a null value, and if so, changes the type of the null value
     # to the type of the variable, e.g.,
-    def __propagate_type_to_null(self, var_def):
-        if var_def.value.is_null():
-            return Value(var_def.type, None)
-        return var_def.value
+    def __propagate_type_to_null(self, var_type, value):
+        if value.is_null():
+            return Value(var_type, None)
+        return value
 
     # given an expression, return a Value object with the expression's evaluated result
     # expressions could be: constants (true, 5, "blah"), variables (e.g., x), arithmetic/string/logical expressions
     # like (+ 5 6), (+ "abc" "def"), (> a 5), method calls (e.g., (call me foo)), or instantiations (e.g., new dog_class)
-    def __evaluate_expression(self, env, expr, line_num_of_statement):
+    def _evaluate_expression(self, env, expr, line_num_of_statement):
         if type(expr) is not list:
             # locals shadow member variables
-            var_def = env.get(expr)
-            if var_def is not None:
-                return self.__propagate_type_to_null(var_def)
-            elif expr in self.fields:
+            slot = env.get(expr)
+            if slot is not None:
+                return self.__propagate_type_to_null(env.types[slot], env.values[slot])
+            elif expr in self.field_slots:
+                slot = self.field_slots[expr]
                 return self.__propagate_type_to_null(
-                    self.fields[expr]
+                    self.class_def.fields[slot].type, self.field_values[slot]
                 )  # return the Value object
             # need to check for variable name and get its value too
             value = create_value(expr)
@@ -352,53 +450,53 @@ class ObjectDef:
             )
 
         operator = expr[0]
-        if operator in self.binary_op_list:
-            operand1 = self.__evaluate_expression(env, expr[1], line_num_of_statement)
-            operand2 = self.__evaluate_expression(env, expr[2], line_num_of_statement)
+        if operator in ObjectDef.BINARY_OP_LIST:
+            operand1 = self._evaluate_expression(env, expr[1], line_num_of_statement)
+            operand2 = self._evaluate_expression(env, expr[2], line_num_of_statement)
             if (
                 operand1.type() == operand2.type()
                 and operand1.type() == ObjectDef.INT_TYPE_CONST
             ):
-                if operator not in self.binary_ops[InterpreterBase.INT_DEF]:
+                if operator not in ObjectDef.BINARY_OPS[InterpreterBase.INT_DEF]:
                     self.interpreter.error(
                         ErrorType.TYPE_ERROR,
                         "invalid operator applied to ints",
                         line_num_of_statement,
                     )
-                return self.binary_ops[InterpreterBase.INT_DEF][operator](
+                return ObjectDef.BINARY_OPS[InterpreterBase.INT_DEF][operator](
                     operand1, operand2
                 )
             if (
                 operand1.type() == operand2.type()
                 and operand1.type() == ObjectDef.STRING_TYPE_CONST
             ):
-                if operator not in self.binary_ops[InterpreterBase.STRING_DEF]:
+                if operator not in ObjectDef.BINARY_OPS[InterpreterBase.STRING_DEF]:
                     self.interpreter.error(
                         ErrorType.TYPE_ERROR,
                         "invalid operator applied to strings",
                         line_num_of_statement,
                     )
-                return self.binary_ops[InterpreterBase.STRING_DEF][operator](
+                return ObjectDef.BINARY_OPS[InterpreterBase.STRING_DEF][operator](
                     operand1, operand2
                 )
             if (
                 operand1.type() == operand2.type()
                 and operand1.type() == ObjectDef.BOOL_TYPE_CONST
             ):
-                if operator not in self.binary_ops[InterpreterBase.BOOL_DEF]:
+                if operator not in ObjectDef.BINARY_OPS[InterpreterBase.BOOL_DEF]:
                     self.interpreter.error(
                         ErrorType.TYPE_ERROR,
                         "invalid operator applied to bool",
                         line_num_of_statement,
                     )
-                return self.binary_ops[InterpreterBase.BOOL_DEF][operator](
+                return ObjectDef.BINARY_OPS[InterpreterBase.BOOL_DEF][operator](
                     operand1, operand2
                 )
             # handle object reference comparisons last
             if self.interpreter.check_type_compatibility(
                 operand1.type(), operand2.type(), False
             ):
-                return self.binary_ops[InterpreterBase.CLASS_DEF][operator](
+                return ObjectDef.BINARY_OPS[InterpreterBase.CLASS_DEF][operator](
                     operand1, operand2
                 )
             self.interpreter.error(
@@ -406,16 +504,16 @@ class ObjectDef:
                 f"operator {operator} applied to two incompatible types",
                 line_num_of_statement,
             )
-        if operator in self.unary_op_list:
-            operand = self.__evaluate_expression(env, expr[1], line_num_of_statement)
+        if operator in ObjectDef.UNARY_OP_LIST:
+            operand = self._evaluate_expression(env, expr[1], line_num_of_statement)
             if operand.type() == ObjectDef.BOOL_TYPE_CONST:
-                if operator not in self.unary_ops[InterpreterBase.BOOL_DEF]:
+                if operator not in ObjectDef.UNARY_OPS[InterpreterBase.BOOL_DEF]:
                     self.interpreter.error(
                         ErrorType.TYPE_ERROR,
                         "invalid unary operator applied to bool",
                         line_num_of_statement,
                     )
-                return self.unary_ops[InterpreterBase.BOOL_DEF][operator](operand)
+                return ObjectDef.UNARY_OPS[InterpreterBase.BOOL_DEF][operator](operand)
 
         # handle call expression: (call objref methodname p1 p2 p3)
         if operator == InterpreterBase.CALL_DEF:
@@ -433,9 +531,18 @@ class ObjectDef:
     # this method is a helper used by call statements and call expressions
     # (call object_ref/me methodname p1 p2 p3)
     def __execute_call_aux(self, env, code, line_num_of_statement):
-        # determine which object we want to call the method on
+        obj, super_only = self._call_target(env, code[1], line_num_of_statement)
+        # prepare the actual arguments for passing
+        actual_args = []
+        for expr in code[3:]:
+            actual_args.append(
+                self._evaluate_expression(env, expr, line_num_of_statement)
+            )
+        return obj.call_method(code[2], actual_args, super_only, line_num_of_statement)
+
+    # determine which object we want to call the method on: returns it, and whether the call is on super
+    def _call_target(self, env, obj_name, line_num_of_statement):
         super_only = False
-        obj_name = code[1]
         if obj_name == InterpreterBase.ME_DEF:
             obj = self
         elif obj_name == InterpreterBase.SUPER_DEF:
@@ -450,45 +557,40 @@ class ObjectDef:
             super_only = True
         else:
             # return a Value() object which has a type and a value
-            obj_val = self.__evaluate_expression(env, obj_name, line_num_of_statement)
+            obj_val = self._evaluate_expression(env, obj_name, line_num_of_statement)
             if obj_val.is_null():
                 self.interpreter.error(
                     ErrorType.FAULT_ERROR, "null dereference", line_num_of_statement
                 )
             obj = obj_val.value()
-        # prepare the actual arguments for passing
-        actual_args = []
-        for expr in code[3:]:
-            actual_args.append(
-                self.__evaluate_expression(env, expr, line_num_of_statement)
-            )
-        return obj.call_method(code[2], actual_args, super_only, line_num_of_statement)
+        return obj, super_only
 
+    # the method map is read-only, so every object of a class shares its ClassDef's map
     def __map_method_names_to_method_definitions(self):
-        self.methods = {}
-        for method in self.class_def.get_methods():
-            self.methods[method.method_name] = method
+        self.methods = self.class_def.method_map
 
+    # field values live in a list indexed by the slots in class_def.field_slots; the field types stay in the
+    # shared VariableDefs of class_def.get_fields(), so instantiation is a single copy of the default vector
     def __instantiate_fields(self):
-        self.fields = {}
-        # get_fields() returns a set of VariableDefs
-        for vardef in self.class_def.get_fields():
-            self.fields[vardef.name] = copy.copy(vardef)
+        self.field_slots = self.class_def.field_slots
+        self.field_values = list(self.class_def.default_field_values)
 
     def __set_field(self, field_name, value, line_num):
-        if field_name not in self.fields:
+        slot = self.field_slots.get(field_name)
+        if slot is None:
             return False
-        var_def = self.fields[field_name]
-        self.__check_type_compatibility(var_def.type, value.type(), True, line_num)
-        var_def.set_value(value)
+        self.__check_type_compatibility(
+            self.class_def.fields[slot].type, value.type(), True, line_num
+        )
+        self.field_values[slot] = value
         return True
 
     def __set_local_or_param(self, env, var_name, value, line_num):
-        var_def = env.get(var_name)
-        if var_def is None:
+        slot = env.get(var_name)
+        if slot is None:
             return False
-        self.__check_type_compatibility(var_def.type, value.type(), True, line_num)
-        var_def.set_value(value)
+        self.__check_type_compatibility(env.types[slot], value.type(), True, line_num)
+        env.values[slot] = value
         return True
 
     def __check_type_compatibility(
@@ -503,70 +605,58 @@ class ObjectDef:
                 line_num,
             )
 
-    def __create_map_of_operations_to_lambdas(self):
-        self.binary_op_list = [
-            "+",
-            "-",
-            "*",
-            "/",
-            "%",
-            "==",
-            "!=",
-            "<",
-            "<=",
-            ">",
-            ">=",
-            "&",
-            "|",
-        ]
-        self.unary_op_list = ["!"]
-        self.binary_ops = {}
-        self.binary_ops[InterpreterBase.INT_DEF] = {
-            "+": lambda a, b: Value(ObjectDef.INT_TYPE_CONST, a.value() + b.value()),
-            "-": lambda a, b: Value(ObjectDef.INT_TYPE_CONST, a.value() - b.value()),
-            "*": lambda a, b: Value(ObjectDef.INT_TYPE_CONST, a.value() * b.value()),
-            "/": lambda a, b: Value(
-                ObjectDef.INT_TYPE_CONST, a.value() // b.value()
-            ),  # // for integer ops
-            "%": lambda a, b: Value(ObjectDef.INT_TYPE_CONST, a.value() % b.value()),
-            "==": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() == b.value()),
-            "!=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() != b.value()),
-            ">": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() > b.value()),
-            "<": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() < b.value()),
-            ">=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() >= b.value()),
-            "<=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() <= b.value()),
-        }
-        self.binary_ops[InterpreterBase.STRING_DEF] = {
-            "+": lambda a, b: Value(ObjectDef.STRING_TYPE_CONST, a.value() + b.value()),
-            "==": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() == b.value()),
-            "!=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() != b.value()),
-            ">": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() > b.value()),
-            "<": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() < b.value()),
-            ">=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() >= b.value()),
-            "<=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() <= b.value()),
-        }
-        self.binary_ops[InterpreterBase.BOOL_DEF] = {
-            "&": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() and b.value()),
-            "|": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() or b.value()),
-            "==": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() == b.value()),
-            "!=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() != b.value()),
-        }
-        self.binary_ops[InterpreterBase.CLASS_DEF] = {
-            "==": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() == b.value()),
-            "!=": lambda a, b: Value(ObjectDef.BOOL_TYPE_CONST, a.value() != b.value()),
-        }
-
-        self.unary_ops = {}
-        self.unary_ops[InterpreterBase.BOOL_DEF] = {
-            "!": lambda a: Value(ObjectDef.BOOL_TYPE_CONST, not a.value()),
-        }
-
     def __init_superclass_if_any(self):
         superclass_def = self.class_def.get_superclass()
         if superclass_def is None:
             self.super_object = None
             return
 
-        self.super_object = ObjectDef(
-            self.interpreter, superclass_def, self.anchor_object, self.trace_output
-        )
\ No newline at end of file
+        self.super_object = type(self)(
+            self.interpreter, superclass_def, self.get_anchor_object()
+        )
+
+    # maps each statement keyword to the method that executes it
+    STATEMENT_HANDLERS = {
+        InterpreterBase.BEGIN_DEF: __execute_begin,
+        InterpreterBase.SET_DEF: __execute_set,
+        InterpreterBase.IF_DEF: __execute_if,
+        InterpreterBase.CALL_DEF: __execute_call,
+        InterpreterBase.WHILE_DEF: __execute_while,
+        InterpreterBase.RETURN_DEF: __execute_return,
+        InterpreterBase.INPUT_STRING_DEF: __execute_inputs,
+        InterpreterBase.INPUT_INT_DEF: __execute_inputi,
+        InterpreterBase.PRINT_DEF: __execute_print,
+        InterpreterBase.LET_DEF: __execute_let,
+        InterpreterBase.TRY_DEF: __execute_try,
+        InterpreterBase.THROW_DEF: __execute_throw,
+    }
+
+    # run once per method when the program is loaded: tags the keyword token of every statement in the
+    # method body with the method that executes it (wrapped by wrap(handler, tok) if given, e.g. by the
+    # tracer or a profiler), so executing a statement never has to compare keywords or check for tracing
+    # or profiling
+    @staticmethod
+    def bind_statement_handlers(code, wrap=None):
+        if not isinstance(code, list) or not code:
+            return
+        tok = code[0]
+        handler = ObjectDef.STATEMENT_HANDLERS.get(
+            tok, ObjectDef.__execute_unknown_statement
+        )
+        if wrap is not None:
+            handler = wrap(handler, tok)
+        tok.handler = handler
+
+        # recurse into the sub-statements of compound statements
+        if tok == InterpreterBase.BEGIN_DEF:
+            sub_statements = code[1:]
+        elif tok == InterpreterBase.LET_DEF:
+            sub_statements = code[2:]
+        elif tok == InterpreterBase.IF_DEF or tok == InterpreterBase.WHILE_DEF:
+            sub_statements = code[2:4]
+        elif tok == InterpreterBase.TRY_DEF:
+            sub_statements = code[1:3]
+        else:
+            sub_statements = []
+        for statement in sub_statements:
+            ObjectDef.bind_statement_handlers(statement, wrap)
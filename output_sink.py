@@ -0,0 +1,105 @@
+"""
+Module with the destinations that InterpreterIO.output (interpreter_io.py) can send printed lines to.
+Pass one to the interpreter as output_sink; every sink gets each line through write_line()
+and is flushed when the program finishes (or before reading keyboard input).
+"""
+
+import collections
+import sys
+
+
+class OutputSink:
+    """
+    Base class for output sinks. On its own, it discards every line.
+    """
+
+    def write_line(self, line):
+        """Handle one line of output (without a trailing newline)."""
+
+    def flush(self):
+        """Push out any lines that are still buffered."""
+
+    def close(self):
+        """Flush, and release anything the sink holds."""
+        self.flush()
+
+
+class DiscardSink(OutputSink):
+    """
+    Drops all output.
+    """
+
+
+class StreamSink(OutputSink):
+    """
+    Writes lines to a text stream (stdout by default). With buffer_lines > 0, lines are
+    collected and written in one call every buffer_lines lines, instead of one write per line.
+    """
+
+    def __init__(self, stream=None, buffer_lines=0):
+        self.stream = stream
+        self.buffer_lines = buffer_lines
+        self.buffer = []
+
+    def write_line(self, line):
+        if not self.buffer_lines:
+            self.__stream().write(f"{line}\n")
+            return
+        self.buffer.append(str(line))
+        if len(self.buffer) >= self.buffer_lines:
+            self.flush()
+
+    def flush(self):
+        stream = self.__stream()
+        if self.buffer:
+            self.buffer.append("")  # so the last line ends with a newline too
+            stream.write("\n".join(self.buffer))
+            self.buffer = []
+        stream.flush()
+
+    # looked up on each write, like print() does, so redirecting sys.stdout still works
+    def __stream(self):
+        if self.stream is None:
+            return sys.stdout
+        return self.stream
+
+
+class FileSink(StreamSink):
+    """
+    Writes lines to the file at path, block-buffered by default.
+    """
+
+    def __init__(self, path, buffer_lines=1024):
+        super().__init__(open(path, "w"), buffer_lines)
+
+    def close(self):
+        super().close()
+        self.stream.close()
+
+
+class CallbackSink(OutputSink):
+    """
+    Calls callback(line) for every line.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write_line(self, line):
+        self.callback(line)
+
+
+class RingBufferSink(OutputSink):
+    """
+    Keeps only the last max_lines lines, e.g. to show the tail of a long run's output.
+    """
+
+    def __init__(self, max_lines):
+        self.lines = collections.deque(maxlen=max_lines)
+
+    def write_line(self, line):
+        self.lines.append(line)
+
+    def get_lines(self):
+        """Get the lines currently held, oldest first."""
+        return list(self.lines)
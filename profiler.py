@@ -0,0 +1,201 @@
+"""
+Module with the deterministic profiler the interpreter uses when it's created with profile=True.
+
+The profiler records, for every Brewin method (ClassDef.method), how many times it was called and
+the inclusive and exclusive time spent in it, and how many times each source line's statement
+executed. It's hooked in by wrapping statement handlers when the program is loaded (see
+ObjectDef.bind_statement_handlers), so a program run without profiling pays nothing for it.
+
+The results can be exported as pstats-compatible data (write_pstats(), readable with
+pstats.Stats(path)) and as collapsed stacks (get_collapsed_stacks()) for flamegraph tools.
+"""
+
+import marshal
+import sys
+import time
+
+
+class Profiler:
+    """
+    Collects per-method timings and per-line execution counts for one interpreter.
+    """
+
+    def __init__(self, timer=time.perf_counter):
+        self.timer = timer
+        # (class name, line number, method name) -> [primitive calls, calls, exclusive time, inclusive time]
+        self.functions = {}
+        # callee key -> {caller key: [primitive calls, calls, exclusive time, inclusive time]}
+        self.callers = {}
+        self.line_counts = {}  # line number -> number of statements executed on that line
+        self.active = {}  # key -> number of calls of that method currently running
+        # frames of the methods currently running:
+        # [key, start time, time spent in callees, call tree node, the method's totals]
+        self.stack = []
+        # call tree: each node is [children by key, exclusive time, calls]; the root has no method
+        self.call_tree = [{}, 0.0, 0]
+
+    def wrap_method(self, handler, key):
+        """
+        Return a statement handler that runs handler, timed as a call of the method identified by
+        key, a (class name, line number, method name) tuple. Used for the top-level statement of
+        each method body.
+        """
+        key = tuple(str(part) if isinstance(part, str) else int(part) for part in key)
+        stats = self.functions.setdefault(key, [0, 0, 0.0, 0.0])
+        stack = self.stack
+        active = self.active
+        active[key] = 0
+        call_tree = self.call_tree
+        callers = self.callers.setdefault(key, {})
+        timer = self.timer
+
+        # enter() and leave(), inlined since this runs on every call
+        def execute_profiled_method(obj, env, return_type, code):
+            parent = stack[-1] if stack else None
+            parent_node = parent[3] if parent is not None else call_tree
+            node = parent_node[0].get(key)
+            if node is None:
+                node = parent_node[0][key] = [{}, 0.0, 0]
+            active[key] += 1
+            start = timer()
+            frame = [key, start, 0.0, node, stats]
+            stack.append(frame)
+            try:
+                return handler(obj, env, return_type, code)
+            finally:
+                elapsed = timer() - start
+                stack.pop()
+                exclusive = elapsed - frame[2]
+                depth = active[key] - 1
+                active[key] = depth
+                stats[1] += 1
+                stats[2] += exclusive
+                node[1] += exclusive
+                node[2] += 1
+                # like cProfile, a recursive call's time is only counted towards the inclusive time
+                # once, by the outermost call, which is the only "primitive" one
+                if depth == 0:
+                    stats[0] += 1
+                    stats[3] += elapsed
+                if parent is not None:
+                    parent[2] += elapsed
+                    edge = callers.get(parent[0])
+                    if edge is None:
+                        edge = callers[parent[0]] = [0, 0, 0.0, 0.0]
+                    edge[1] += 1
+                    edge[2] += exclusive
+                    if depth == 0:
+                        edge[0] += 1
+                        edge[3] += elapsed
+
+        return execute_profiled_method
+
+    def wrap_statement(self, handler):
+        """
+        Return a statement handler that counts the statement's line, then runs handler.
+        """
+        line_counts = self.line_counts
+
+        def execute_counted(obj, env, return_type, code):
+            line_num = code[0].line_num
+            line_counts[line_num] = line_counts.get(line_num, 0) + 1
+            return handler(obj, env, return_type, code)
+
+        return execute_counted
+
+    def get_method_stats(self):
+        """
+        Get a dict mapping "class.method" to a dict of its call count and its inclusive and
+        exclusive time in seconds. Overloaded methods are told apart by appending ":line".
+        """
+        names = {}
+        for (class_name, _, method_name), stats in self.functions.items():
+            if not stats[1]:
+                continue
+            name = f"{class_name}.{method_name}"
+            names[name] = names.get(name, 0) + 1
+        method_stats = {}
+        for key, (_, calls, exclusive, inclusive) in self.functions.items():
+            if not calls:
+                continue
+            class_name, line_num, method_name = key
+            name = f"{class_name}.{method_name}"
+            if names[name] > 1:
+                name = f"{name}:{line_num}"
+            method_stats[name] = {
+                "calls": calls,
+                "inclusive_time": inclusive,
+                "exclusive_time": exclusive,
+            }
+        return method_stats
+
+    def get_line_counts(self):
+        """Get a dict mapping each executed source line number to its statement execution count."""
+        return dict(self.line_counts)
+
+    def get_pstats_data(self):
+        """
+        Get the results in the format pstats stores: a dict mapping (file, line, function) to
+        (primitive calls, calls, exclusive time, inclusive time, callers). The class name is used
+        as the file name.
+        """
+        data = {}
+        for key, (primitive, calls, exclusive, inclusive) in self.functions.items():
+            if not calls:
+                continue
+            callers = {
+                caller: tuple(edge) for caller, edge in self.callers.get(key, {}).items()
+            }
+            data[key] = (primitive, calls, exclusive, inclusive, callers)
+        return data
+
+    def write_pstats(self, path):
+        """Write the results to path in the format pstats.Stats(path) reads."""
+        with open(path, "wb") as f:
+            marshal.dump(self.get_pstats_data(), f)
+
+    def get_collapsed_stacks(self):
+        """
+        Get the results as collapsed stacks, one "class.method;class.method;... microseconds"
+        line per distinct call stack, weighted by the exclusive time spent with that stack.
+        """
+        lines = []
+        self.__collapse(self.call_tree, [], lines)
+        return lines
+
+    def write_collapsed_stacks(self, path):
+        """Write the collapsed stacks to path, for flamegraph.pl, speedscope, etc."""
+        with open(path, "w") as f:
+            for line in self.get_collapsed_stacks():
+                f.write(line + "\n")
+
+    def print_stats(self, stream=None, limit=20):
+        """Print the methods with the most exclusive time, then the most executed lines."""
+        if stream is None:
+            stream = sys.stdout
+        method_stats = sorted(
+            self.get_method_stats().items(),
+            key=lambda item: item[1]["exclusive_time"],
+            reverse=True,
+        )
+        stream.write(f"{'calls':>10} {'exclusive':>12} {'inclusive':>12}  method\n")
+        for name, stats in method_stats[:limit]:
+            stream.write(
+                f"{stats['calls']:>10} {stats['exclusive_time']:>12.6f} "
+                f"{stats['inclusive_time']:>12.6f}  {name}\n"
+            )
+        line_counts = sorted(
+            self.line_counts.items(), key=lambda item: item[1], reverse=True
+        )
+        stream.write(f"\n{'count':>10}  line\n")
+        for line_num, count in line_counts[:limit]:
+            stream.write(f"{count:>10}  {line_num}\n")
+
+    def __collapse(self, node, names, lines):
+        for (class_name, _, method_name), child in node[0].items():
+            names.append(f"{class_name}.{method_name}")
+            microseconds = round(child[1] * 1e6)
+            if microseconds > 0:
+                lines.append(f"{';'.join(names)} {microseconds}")
+            self.__collapse(child, names, lines)
+            names.pop()
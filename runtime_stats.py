@@ -0,0 +1,184 @@
+"""
+Module with the counters the interpreter keeps about its own work when it's created with
+collect_stats=True, to find out which subsystem dominates a given workload.
+
+Counting never touches the normal execution path. Instead, an interpreter collecting stats
+instantiates CountingObjectDef and CountingFrame, instrumented subclasses of ObjectDef and Frame,
+and wraps its own check_type_compatibility, so nothing outside the interpreter is changed and
+other interpreters running at the same time aren't affected. After run(), interpreter.stats holds
+the counts, exportable with to_dict(), to_json(), or write_json().
+"""
+
+import json
+
+from env_v3 import Frame
+from intbase import InterpreterBase
+from objectv3 import ObjectDef
+
+
+class RuntimeStats:
+    """
+    The counters for one interpreter.
+    """
+
+    def __init__(self):
+        self.value_allocations = 0  # Values created by the statements and expressions run
+        self.object_allocations = 0  # objects created by new (and the main object)
+        self.object_parts = 0  # ObjectDefs created, including the superclass parts of each object
+        self.method_lookups = 0
+        self.method_lookup_misses = 0
+        self.method_lookup_walks = {}  # super-chain hops taken to find the method -> number of lookups
+        self.type_checks = 0  # calls to check_type_compatibility
+        # block depth the variable was found at (0 = innermost), or "miss" (so it's a field or constant) -> count
+        self.env_lookups = {}
+        self.statements = {}  # statement keyword -> number executed
+        self.expressions = {}  # operator, "call", "new", "variable", or "constant" -> number evaluated
+
+    def to_dict(self):
+        """Get the counters as a dict of plain values."""
+        return {
+            "value_allocations": self.value_allocations,
+            "object_allocations": self.object_allocations,
+            "object_parts": self.object_parts,
+            "method_lookups": self.method_lookups,
+            "method_lookup_misses": self.method_lookup_misses,
+            "method_lookup_walks": {
+                str(hops): count for hops, count in sorted(self.method_lookup_walks.items())
+            },
+            "type_checks": self.type_checks,
+            "env_lookups": {
+                str(depth): self.env_lookups[depth] for depth in sorted(
+                    self.env_lookups, key=lambda depth: (depth == "miss", 0 if depth == "miss" else depth)
+                )
+            },
+            "statements": {str(kind): count for kind, count in self.statements.items()},
+            "statements_total": sum(self.statements.values()),
+            "expressions": {str(kind): count for kind, count in self.expressions.items()},
+            "expressions_total": sum(self.expressions.values()),
+        }
+
+    def to_json(self, indent=2):
+        """Get the counters as a JSON string."""
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def write_json(self, path):
+        """Write the counters to path as JSON."""
+        with open(path, "w") as f:
+            f.write(self.to_json())
+            f.write("\n")
+
+    def count_type_checks(self, check_type_compatibility):
+        """Return check_type_compatibility wrapped to count its calls."""
+
+        def counted_check_type_compatibility(typea, typeb, for_assignment=False):
+            self.type_checks += 1
+            return check_type_compatibility(typea, typeb, for_assignment)
+
+        return counted_check_type_compatibility
+
+    def new_frame(self, size):
+        """Create a CountingFrame reporting to these stats; used as the interpreter's FramePool factory."""
+        return CountingFrame(size, self)
+
+
+class CountingObjectDef(ObjectDef):
+    """
+    ObjectDef that counts allocations, method lookups, statements, and expressions into its
+    interpreter's stats, through ObjectDef's hook points and the helpers that create Values.
+    """
+
+    # expression operators whose evaluation creates a Value (a call's Value is created by the
+    # method it calls)
+    ALLOCATING_OPERATORS = frozenset(
+        ObjectDef.BINARY_OP_LIST + ObjectDef.UNARY_OP_LIST + [InterpreterBase.NEW_DEF]
+    )
+    # statements that create a Value themselves
+    ALLOCATING_STATEMENTS = frozenset([InterpreterBase.INPUT_INT_DEF, InterpreterBase.INPUT_STRING_DEF])
+
+    def __init__(self, interpreter, class_def, anchor_object=None):
+        stats = interpreter.stats
+        stats.object_parts += 1
+        if anchor_object is None:
+            stats.object_allocations += 1
+        super().__init__(interpreter, class_def, anchor_object)
+
+    def _get_obj_with_method(self, start_obj, method_name, actual_params):
+        obj = ObjectDef._get_obj_with_method(self, start_obj, method_name, actual_params)
+        stats = self.interpreter.stats
+        stats.method_lookups += 1
+        if obj is None:
+            stats.method_lookup_misses += 1
+            return obj
+        hops = 0
+        cur_obj = start_obj
+        while cur_obj is not obj:
+            cur_obj = cur_obj.super_object
+            hops += 1
+        stats.method_lookup_walks[hops] = stats.method_lookup_walks.get(hops, 0) + 1
+        return obj
+
+    def _execute_statement(self, env, return_type, code):
+        stats = self.interpreter.stats
+        kind = code[0]
+        stats.statements[kind] = stats.statements.get(kind, 0) + 1
+        if kind in CountingObjectDef.ALLOCATING_STATEMENTS:
+            stats.value_allocations += 1
+        elif kind == InterpreterBase.RETURN_DEF and len(code) == 1:
+            stats.value_allocations += 1  # the return type's default value
+        return ObjectDef._execute_statement(self, env, return_type, code)
+
+    def _evaluate_expression(self, env, expr, line_num_of_statement):
+        stats = self.interpreter.stats
+        if type(expr) is list:
+            kind = expr[0]
+            allocates = kind in CountingObjectDef.ALLOCATING_OPERATORS
+        elif expr in env.symbols or expr in self.field_slots:
+            kind = "variable"
+            allocates = False
+        else:
+            kind = "constant"
+            allocates = True
+        stats.expressions[kind] = stats.expressions.get(kind, 0) + 1
+        value = ObjectDef._evaluate_expression(self, env, expr, line_num_of_statement)
+        # a variable holding null is read as a new null Value of the variable's type
+        if allocates or (kind == "variable" and value.is_null()):
+            stats.value_allocations += 1
+        return value
+
+    def _add_locals_to_env(self, env, var_defs, line_number):
+        self.interpreter.stats.value_allocations += len(var_defs)
+        ObjectDef._add_locals_to_env(self, env, var_defs, line_number)
+
+    def _default_return_value(self, method_def):
+        self.interpreter.stats.value_allocations += 1
+        return ObjectDef._default_return_value(self, method_def)
+
+    def _check_return_value(self, return_type, result, line_num):
+        if result.is_typeless_null():
+            self.interpreter.stats.value_allocations += 1  # null given the return type
+        return ObjectDef._check_return_value(self, return_type, result, line_num)
+
+    def _enter_catch(self, env, blocks, exception):
+        self.interpreter.stats.value_allocations += 1  # the exception variable's value
+        ObjectDef._enter_catch(self, env, blocks, exception)
+
+
+class CountingFrame(Frame):
+    """
+    Frame that counts variable lookups by the depth of the block the variable was found in.
+    """
+
+    def __init__(self, size, stats):
+        super().__init__(size)
+        self.stats = stats
+
+    def get(self, symbol):
+        slot = self.symbols.get(symbol)
+        env_lookups = self.stats.env_lookups
+        if slot is None:
+            depth = "miss"
+        else:
+            # the blocks that started after the slot are the ones nested inside its block
+            depth = sum(1 for top, _ in self.blocks if top > slot)
+        env_lookups[depth] = env_lookups.get(depth, 0) + 1
+        return slot
@@ -0,0 +1,211 @@
+"""
+Module with the sampling profiler the interpreter uses when it's created with a sampling_interval.
+
+Unlike the deterministic profiler (profiler.py), which times every call, this one just looks at what
+the program is doing every sampling_interval seconds, so it barely changes how long hot loops take
+and can be left on for long runs. It looks at a shadow stack of the Brewin calls in progress, one
+(class name, method name) frame per call, which the method bodies' statement handlers (wrapped when the
+program is loaded, see ObjectDef.bind_statement_handlers) push and pop. Nothing is done per statement:
+the line each call is on is read, only when a sample is taken, from the statement handlers on the
+interrupted Python stack.
+
+Samples are taken by a SIGPROF interval timer (so the interval is measured in CPU time) when the
+program runs on the main thread of a platform that has one, and by a background thread otherwise.
+"""
+
+import signal
+import sys
+import threading
+
+from objectv3 import ObjectDef
+
+
+class SamplingProfiler:
+    """
+    Samples the Brewin call stack of one interpreter while it runs.
+    """
+
+    # only the innermost frames of deeper stacks are kept, so deep recursion can't blow up memory use
+    MAX_STACK_DEPTH = 256
+
+    def __init__(self, interval=0.001, mode="auto"):
+        """
+        interval is the time between samples in seconds; mode is "signal", "thread", or "auto"
+        (signal where possible).
+        """
+        self.interval = interval
+        self.mode = mode
+        self.shadow_stack = []  # (class name, method name) per call in progress
+        # code objects of the statement handlers, and of the wrapper that pushes shadow frames
+        self.statement_codes = {
+            handler.__code__ for handler in ObjectDef.STATEMENT_HANDLERS.values()
+        }
+        self.method_code = None
+        self.samples = {}  # stack, as a tuple of (class, method, line) tuples -> number of samples
+        self.sample_count = 0
+        self.running = False
+        self.previous_handler = None
+        self.stop_event = None
+        self.thread = None
+        self.thread_id = None  # the thread running the program, when sampling from another thread
+
+    def wrap_method(self, handler, key):
+        """
+        Return a statement handler that runs handler with a frame for the method identified by key,
+        a (class name, line number, method name) tuple, pushed on the shadow stack. Used for the
+        top-level statement of each method body.
+        """
+        class_name, _, method_name = key
+        frame = (str(class_name), str(method_name))
+        shadow_stack = self.shadow_stack
+
+        def execute_sampled_method(obj, env, return_type, code):
+            shadow_stack.append(frame)
+            try:
+                return handler(obj, env, return_type, code)
+            finally:
+                shadow_stack.pop()
+
+        self.method_code = execute_sampled_method.__code__
+        return execute_sampled_method
+
+    def wrap_statement(self, handler):
+        """
+        Statements are left alone; lines are found when a sample is taken.
+        """
+        return handler
+
+    def start(self):
+        """Start taking samples."""
+        if self.running:
+            return
+        self.running = True
+        mode = self.mode
+        if mode == "auto":
+            on_main_thread = threading.current_thread() is threading.main_thread()
+            mode = "signal" if on_main_thread and hasattr(signal, "setitimer") else "thread"
+        if mode == "signal":
+            self.previous_handler = signal.signal(signal.SIGPROF, self.__on_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self.thread_id = threading.get_ident()
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(target=self.__sample_periodically, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop taking samples."""
+        if not self.running:
+            return
+        self.running = False
+        if self.thread is not None:
+            self.stop_event.set()
+            self.thread.join()
+            self.thread = None
+        else:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self.previous_handler)
+
+    def take_sample(self, python_frame):
+        """
+        Record the current shadow stack as one sample, with the lines found by walking the Python
+        stack outward from python_frame, the frame the program was interrupted in.
+        """
+        stack = self.shadow_stack[-self.MAX_STACK_DEPTH:]  # a copy, made in one step
+        if not stack:
+            return
+        # each shadow frame's line is that of the innermost statement handler running inside it
+        lines = []
+        line_num = None
+        while python_frame is not None and len(lines) < len(stack):
+            code = python_frame.f_code
+            if code is self.method_code:
+                lines.append(line_num)
+                line_num = None
+            elif line_num is None and code in self.statement_codes:
+                line_num = python_frame.f_locals["code"][0].line_num
+            python_frame = python_frame.f_back
+        lines.extend([None] * (len(stack) - len(lines)))
+        lines.reverse()
+        key = tuple(
+            (class_name, method_name, line_num)
+            for (class_name, method_name), line_num in zip(stack, lines)
+        )
+        self.samples[key] = self.samples.get(key, 0) + 1
+        self.sample_count += 1
+
+    def get_method_samples(self):
+        """
+        Get a dict mapping "class.method" to a dict with its "self" samples (taken while the method
+        itself was running) and "total" samples (taken while it was anywhere on the stack).
+        """
+        method_samples = {}
+        for stack, count in self.samples.items():
+            seen = set()
+            for depth, (class_name, method_name, _) in enumerate(stack):
+                name = f"{class_name}.{method_name}"
+                counts = method_samples.get(name)
+                if counts is None:
+                    counts = method_samples[name] = {"self": 0, "total": 0}
+                if name not in seen:
+                    counts["total"] += count
+                    seen.add(name)
+                if depth == len(stack) - 1:
+                    counts["self"] += count
+        return method_samples
+
+    def get_line_samples(self):
+        """Get a dict mapping source line numbers to the number of samples taken while running them."""
+        line_samples = {}
+        for stack, count in self.samples.items():
+            line_num = stack[-1][2]
+            if line_num is None:
+                continue  # taken between entering a method and starting its body
+            line_samples[line_num] = line_samples.get(line_num, 0) + count
+        return line_samples
+
+    def get_collapsed_stacks(self):
+        """
+        Get the samples as collapsed stacks, one "class.method;class.method;... count" line per
+        distinct call stack, for flamegraph tools.
+        """
+        collapsed = {}
+        for stack, count in self.samples.items():
+            names = ";".join(f"{class_name}.{method_name}" for class_name, method_name, _ in stack)
+            collapsed[names] = collapsed.get(names, 0) + count
+        return [f"{names} {count}" for names, count in collapsed.items()]
+
+    def write_collapsed_stacks(self, path):
+        """Write the collapsed stacks to path, for flamegraph.pl, speedscope, etc."""
+        with open(path, "w") as f:
+            for line in self.get_collapsed_stacks():
+                f.write(line + "\n")
+
+    def print_report(self, stream=None, limit=20):
+        """Print the methods with the most samples, then the lines with the most samples."""
+        if stream is None:
+            stream = sys.stdout
+        total = self.sample_count or 1
+        stream.write(f"{self.sample_count} samples every {self.interval}s\n")
+        stream.write(f"{'self':>8} {'self%':>7} {'total':>8} {'total%':>7}  method\n")
+        method_samples = sorted(
+            self.get_method_samples().items(), key=lambda item: item[1]["self"], reverse=True
+        )
+        for name, counts in method_samples[:limit]:
+            stream.write(
+                f"{counts['self']:>8} {100 * counts['self'] / total:>6.1f}% "
+                f"{counts['total']:>8} {100 * counts['total'] / total:>6.1f}%  {name}\n"
+            )
+        line_samples = sorted(
+            self.get_line_samples().items(), key=lambda item: item[1], reverse=True
+        )
+        stream.write(f"\n{'samples':>8}  line\n")
+        for line_num, count in line_samples[:limit]:
+            stream.write(f"{count:>8}  {line_num}\n")
+
+    def __on_signal(self, signum, frame):
+        self.take_sample(frame)
+
+    def __sample_periodically(self):
+        while not self.stop_event.wait(self.interval):
+            self.take_sample(sys._current_frames().get(self.thread_id))
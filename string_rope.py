@@ -0,0 +1,68 @@
+"""
+Module with the lazy representation used for Brewin strings built by concatenation.
+
+A Brewin program that builds a string with (set s (+ s x)) in a loop would copy the whole
+string on every iteration if + produced a new Python str each time. Instead, once a result is
+long enough to matter, + produces a StringRope that just records the pieces, and the pieces
+are only joined (once) when the string's contents are needed: when it's printed or compared.
+"""
+
+# results shorter than this are concatenated eagerly; copying them is cheaper than a rope
+MIN_ROPE_LENGTH = 64
+
+
+class StringRope:
+    """
+    A string made of the first count items of parts. Ropes made by appending to a rope share its
+    parts list, so appending to the newest rope of a chain doesn't copy anything.
+    """
+
+    __slots__ = ("parts", "count", "length", "flat")
+
+    def __init__(self, parts, count, length):
+        self.parts = parts
+        self.count = count
+        self.length = length
+        self.flat = None  # the joined string, once something asked for it
+
+    def append(self, string):
+        """Return a new rope for this string followed by string (a str)."""
+        parts = self.parts
+        if len(parts) != self.count:
+            # another rope was already built by appending to this one; don't clobber its parts
+            parts = parts[:self.count]
+        parts.append(string)
+        return StringRope(parts, self.count + 1, self.length + len(string))
+
+    def __str__(self):
+        if self.flat is None:
+            parts = self.parts
+            if len(parts) != self.count:
+                parts = parts[:self.count]
+            self.flat = "".join(parts)
+        return self.flat
+
+    def __len__(self):
+        return self.length
+
+
+def concat(a, b):
+    """
+    Concatenate two Brewin string values (each a str or a StringRope), returning a str or a StringRope.
+    """
+    if type(b) is StringRope:
+        b = str(b)
+    if type(a) is StringRope:
+        return a.append(b)
+    if len(a) + len(b) < MIN_ROPE_LENGTH:
+        return a + b
+    return StringRope([a, b], 2, len(a) + len(b))
+
+
+def flatten(s):
+    """
+    Get the contents of a Brewin string value (a str or a StringRope) as a str.
+    """
+    if type(s) is StringRope:
+        return str(s)
+    return s
@@ -0,0 +1,124 @@
+"""
+Module with the execution tracer the interpreters use when they're created with trace_output.
+
+Instead of printing every statement as it runs, the tracer records one compact event per
+statement (its line, its keyword, and the class and method running it) into a ring buffer that
+keeps only the most recent events, and dumps them if the program fails. Events can be limited to
+some classes, methods, or a range of lines, and sampled (only every Nth statement recorded).
+
+The v3 interpreter applies the class, method, and line filters when the program is loaded, so
+statements that are filtered out run exactly as they do without tracing.
+"""
+
+import collections
+import sys
+
+TraceEvent = collections.namedtuple(
+    "TraceEvent", ["seq", "line_num", "kind", "class_name", "method_name"]
+)
+
+
+class Tracer:
+    """
+    Records statement events into a bounded ring buffer.
+    """
+
+    def __init__(self, capacity=4096, classes=None, methods=None, lines=None, sample_every=1,
+                 dump_on_error=True, error_stream=None):
+        """
+        capacity is the number of events kept; classes and methods, if given, are collections of
+        the class and method names to trace; lines, if given, is a (first, last) pair of line
+        numbers to trace; sample_every=N records only every Nth traced statement. If dump_on_error
+        is set, the events are written to error_stream (stderr by default) when the program fails.
+        """
+        self.events = collections.deque(maxlen=capacity)
+        self.classes = None if classes is None else frozenset(classes)
+        self.methods = None if methods is None else frozenset(methods)
+        self.lines = lines
+        self.sample_every = sample_every
+        self.dump_on_error = dump_on_error
+        self.error_stream = error_stream
+        self.statement_count = 0  # statements that passed the filters, recorded or not
+        self.method_stack = []  # (class name, method name) of the running calls, for interpreters that report them
+
+    def traces_method(self, class_name, method_name):
+        """Check whether statements of the given method pass the class and method filters."""
+        if self.classes is not None and class_name not in self.classes:
+            return False
+        return self.methods is None or method_name in self.methods
+
+    def traces_line(self, line_num):
+        """Check whether statements on the given line pass the line filter."""
+        if self.lines is None:
+            return True
+        first, last = self.lines
+        return first <= line_num <= last
+
+    def record(self, line_num, kind, class_name, method_name):
+        """Count a statement that passed the filters, recording it if it's sampled."""
+        self.statement_count += 1
+        if self.statement_count % self.sample_every:
+            return
+        self.events.append(
+            TraceEvent(self.statement_count, line_num, kind, class_name, method_name)
+        )
+
+    def wrap_statement(self, handler, tok, class_name, method_name):
+        """
+        Return a statement handler that records the statement whose keyword token is tok, then runs
+        handler; or handler itself if the statement is filtered out.
+        """
+        if not self.traces_method(class_name, method_name) or not self.traces_line(tok.line_num):
+            return handler
+        record = self.record
+        line_num = tok.line_num
+        kind = str(tok)
+        class_name = str(class_name)
+        method_name = str(method_name)
+
+        def execute_traced(obj, env, return_type, code):
+            record(line_num, kind, class_name, method_name)
+            return handler(obj, env, return_type, code)
+
+        return execute_traced
+
+    def enter_method(self, class_name, method_name):
+        """Note that a call of the given method started, for record_statement()."""
+        self.method_stack.append((class_name, method_name))
+
+    def leave_method(self):
+        """Note that the innermost call finished."""
+        self.method_stack.pop()
+
+    def record_statement(self, line_num, kind):
+        """Record a statement of the innermost call, checking the filters as it runs."""
+        class_name, method_name = self.method_stack[-1] if self.method_stack else (None, None)
+        if self.traces_method(class_name, method_name) and self.traces_line(line_num):
+            self.record(line_num, str(kind), str(class_name), str(method_name))
+
+    def get_events(self):
+        """Get the recorded events, oldest first, as TraceEvents."""
+        return list(self.events)
+
+    def clear(self):
+        """Drop the recorded events."""
+        self.events.clear()
+
+    def dump(self, stream=None):
+        """Write the recorded events to stream (stdout by default), one per line."""
+        if stream is None:
+            stream = sys.stdout
+        for event in self.events:
+            stream.write(
+                f"{event.seq:>8} line {event.line_num}: {event.kind} "
+                f"in {event.class_name}.{event.method_name}\n"
+            )
+        stream.flush()
+
+    def report_error(self, error):
+        """Called by the interpreter when the program fails; dumps the events if dump_on_error is set."""
+        if not self.dump_on_error:
+            return
+        stream = self.error_stream if self.error_stream is not None else sys.stderr
+        stream.write(f"last {len(self.events)} traced statements before: {error}\n")
+        self.dump(stream)